@@ -0,0 +1,155 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from whisper.audio import N_FRAMES, N_SAMPLES, SAMPLE_RATE, HOP_LENGTH, log_mel_spectrogram
+
+from .processor import AudioProcessor
+
+
+class FeatureCache:
+    """
+    Padded log-mel features computed once per file and shared between
+    decoding passes and model sizes.
+
+    Entries are keyed by file identity (path, size, mtime) and n_mels, so the
+    80-bin front end is shared by every model except large-v3, which gets its
+    own 128-bin entry. Features are kept in an in-memory LRU bounded by bytes
+    and, if cache_dir is set, persisted as .npy files that are memory-mapped
+    on later runs.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, cache_dir=None, audio_processor=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.audio_processor = audio_processor or AudioProcessor()
+        self.logger = logging.getLogger(__name__)
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def log_mel(self, file_path, n_mels=80):
+        """Return padded log-mel frames (n_mels x frames) for an audio file"""
+        key = self._key(file_path, n_mels)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        mel = self._load_from_disk(key)
+        if mel is None:
+            self.misses += 1
+            audio, _ = self.audio_processor.load_audio(file_path)
+            mel = self.compute(audio, n_mels)
+            self._save_to_disk(key, mel)
+        else:
+            self.hits += 1
+
+        self._put(key, mel)
+        return mel
+
+    @staticmethod
+    def compute(audio, n_mels=80):
+        """Compute padded log-mel frames for an in-memory 16kHz waveform"""
+        mel = log_mel_spectrogram(np.asarray(audio, dtype=np.float32), n_mels, padding=N_SAMPLES)
+        return mel.cpu().numpy()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def _key(self, file_path, n_mels):
+        file_path = Path(file_path).resolve()
+        stat = file_path.stat()
+        identity = f"{file_path}|{stat.st_size}|{stat.st_mtime_ns}"
+        digest = hashlib.sha1(identity.encode('utf-8')).hexdigest()
+        return f"{digest}_{n_mels}"
+
+    def _put(self, key, mel):
+        # Memory-mapped entries are backed by the page cache, not our budget
+        size = 0 if isinstance(mel, np.memmap) else mel.nbytes
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = mel
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                if not isinstance(evicted, np.memmap):
+                    self._bytes -= evicted.nbytes
+
+    def _load_from_disk(self, key):
+        if not self.cache_dir:
+            return None
+        cache_file = self.cache_dir / f"{key}.npy"
+        if not cache_file.exists():
+            return None
+        try:
+            return np.load(cache_file, mmap_mode='r')
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable feature cache {cache_file}: {e}")
+            return None
+
+    def _save_to_disk(self, key, mel):
+        if not self.cache_dir:
+            return
+        cache_file = self.cache_dir / f"{key}.npy"
+        temp_file = cache_file.with_name(cache_file.name + ".part")
+        try:
+            with open(temp_file, 'wb') as f:
+                np.save(f, mel)
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            self.logger.warning(f"Could not write feature cache {cache_file}: {e}")
+            if temp_file.exists():
+                temp_file.unlink()
+
+
+def speech_probe(mel, probe_seconds=10.0, margin=0.75):
+    """
+    Pick up to probe_seconds of speech frames from padded log-mel features.
+
+    Frames whose mean log-mel energy is within margin of the loudest frame
+    count as speech (Whisper's log-mel is scaled so 1.0 is about 40dB; the
+    default margin is about 30dB). Used as a short probe for language ID.
+    """
+    content = mel[:, :max(0, mel.shape[-1] - N_FRAMES)]
+    if content.shape[-1] == 0:
+        return mel[:, :N_FRAMES]
+    energy = np.asarray(content.mean(axis=0))
+    speech = np.flatnonzero(energy >= energy.max() - margin)
+    frames = speech[:int(probe_seconds * SAMPLE_RATE / HOP_LENGTH)]
+    return np.asarray(content[:, frames])
+
+
+# Shared by every model instance in the process unless one is passed explicitly
+default_feature_cache = None
+
+
+def get_default_feature_cache():
+    global default_feature_cache
+    if default_feature_cache is None:
+        from config.settings import FEATURE_CACHE_BYTES, FEATURE_CACHE_DIR
+        default_feature_cache = FeatureCache(max_bytes=FEATURE_CACHE_BYTES, cache_dir=FEATURE_CACHE_DIR)
+    return default_feature_cache
@@ -3,6 +3,7 @@ import numpy as np
 import soundfile as sf
 from pydub import AudioSegment
 from pathlib import Path
+from dataclasses import replace
 import logging
 
 class AudioProcessor:
@@ -36,6 +37,40 @@ class AudioProcessor:
             except Exception as e:
                 raise Exception(f"Failed to load audio: {e}")
     
+    def load_audio_into(self, file_path, pool):
+        """
+        Decode an audio file into a shared-memory slab from a SlabPool.
+        Returns a SlabDescriptor for the consumer process.
+        """
+        file_path = Path(file_path)
+        
+        if not file_path.exists():
+            raise FileNotFoundError(f"Audio file not found: {file_path}")
+        
+        # Fast path: mono files already at the target rate are read straight into the slab
+        try:
+            f = sf.SoundFile(str(file_path))
+        except sf.LibsndfileError:
+            # Not readable by libsndfile (mp3, m4a, ...)
+            f = None
+        if f is not None:
+            with f:
+                if f.samplerate == self.target_sr and f.channels == 1:
+                    descriptor, slab = pool.acquire(f.frames, source=file_path)
+                    try:
+                        read = f.read(frames=f.frames, dtype='float32', out=slab)
+                    except Exception:
+                        pool.discard(descriptor)
+                        raise
+                    if len(read) != descriptor.length:
+                        descriptor = replace(descriptor, length=len(read))
+                    return descriptor
+        
+        audio, _ = self.load_audio(file_path)
+        descriptor, slab = pool.acquire(len(audio), source=file_path)
+        slab[:] = audio
+        return descriptor
+    
     def preprocess(self, audio):
         """Preprocess audio for better transcription"""
         # Normalize
@@ -0,0 +1,235 @@
+import sys
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SlabDescriptor:
+    """Small, picklable handle to audio sitting in a shared-memory slab"""
+    name: str
+    index: int
+    length: int
+    sample_rate: int
+    dtype: str = "float32"
+    source: str = ""
+    oversize: bool = False
+
+
+def _attach(name, own_tracker):
+    """
+    Attach to an existing segment without letting this process's resource
+    tracker unlink it on exit. Consumers started through multiprocessing
+    share the producer's tracker; only an unrelated process has its own.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if own_tracker:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _close(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # A NumPy view is still alive; the mapping is released with it
+        pass
+
+
+class SlabPool:
+    """
+    Pool of reusable shared-memory slabs for passing decoded audio between
+    processes without pickling the samples. A transport building block:
+    the transcription pipeline itself still runs in a single process.
+
+    The producer acquire()s a free slab, decodes into the array it returns,
+    and sends the SlabDescriptor to the consumer. The consumer reads through
+    SlabReader and release()s the descriptor, which puts the slab index on
+    a return queue; the producer picks it up on its next acquire(). Clips
+    longer than a slab get a one-off segment that is unlinked when
+    recycled. close() reports slabs that were never returned.
+    """
+
+    def __init__(self, slab_samples, count=4, sample_rate=16000, dtype="float32", ctx=None):
+        self.slab_samples = slab_samples
+        self.count = count
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        self.logger = logging.getLogger(__name__)
+
+        ctx = ctx or multiprocessing.get_context()
+        self.returns = ctx.Queue()
+
+        slab_bytes = slab_samples * self.dtype.itemsize
+        self.slabs = [shared_memory.SharedMemory(create=True, size=slab_bytes) for _ in range(count)]
+        self._free = list(range(count))
+        self._outstanding = {}
+        self._oversize = {}
+        self._next_oversize = count
+        self._lock = threading.Lock()
+        self.closed = False
+
+    @property
+    def reader(self):
+        """Consumer-side handle (picklable, pass it to a multiprocessing child)"""
+        return SlabReader(self.returns)
+
+    def acquire(self, length, source="", timeout=None):
+        """
+        Reserve a slab for `length` samples; returns (descriptor, writable array).
+        Blocks until a slab is returned if all are in use.
+        """
+        if self.closed:
+            raise RuntimeError("SlabPool is closed")
+
+        if length > self.slab_samples:
+            shm = shared_memory.SharedMemory(create=True, size=max(1, length * self.dtype.itemsize))
+            with self._lock:
+                index = self._next_oversize
+                self._next_oversize += 1
+                self._oversize[index] = shm
+                descriptor = SlabDescriptor(shm.name, index, length, self.sample_rate,
+                                            self.dtype.str, str(source), oversize=True)
+                self._outstanding[index] = (descriptor, time.monotonic())
+            return descriptor, self._array(shm, length)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.collect()
+            with self._lock:
+                if self._free:
+                    index = self._free.pop()
+                    shm = self.slabs[index]
+                    descriptor = SlabDescriptor(shm.name, index, length, self.sample_rate,
+                                                self.dtype.str, str(source))
+                    self._outstanding[index] = (descriptor, time.monotonic())
+                    return descriptor, self._array(shm, length)
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError("No free audio slab; consumers are not releasing them")
+            try:
+                self._recycle(self.returns.get(timeout=remaining))
+            except queue.Empty:
+                raise TimeoutError("No free audio slab; consumers are not releasing them") from None
+
+    def collect(self):
+        """Recycle every slab the consumers have released so far"""
+        while True:
+            try:
+                self._recycle(self.returns.get_nowait())
+            except queue.Empty:
+                return
+
+    def _recycle(self, index):
+        with self._lock:
+            if self._outstanding.pop(index, None) is None:
+                self.logger.warning(f"Slab {index} released twice or unknown")
+                return
+            if index in self._oversize:
+                shm = self._oversize.pop(index)
+                _close(shm)
+                shm.unlink()
+            else:
+                self._free.append(index)
+
+    def discard(self, descriptor):
+        """Return a slab that was acquired but never sent (e.g. decode failed)"""
+        self._recycle(descriptor.index)
+
+    def _array(self, shm, length):
+        return np.ndarray((length,), dtype=self.dtype, buffer=shm.buf)
+
+    def outstanding(self):
+        with self._lock:
+            return [descriptor for descriptor, _ in self._outstanding.values()]
+
+    def close(self, timeout=1.0):
+        """
+        Unlink every segment. Slabs still held by consumers after `timeout`
+        seconds are reported as leaks; returns the leaked descriptors.
+        """
+        if self.closed:
+            return []
+
+        deadline = time.monotonic() + timeout
+        while self.outstanding() and time.monotonic() < deadline:
+            try:
+                self._recycle(self.returns.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+
+        leaked = self.outstanding()
+        now = time.monotonic()
+        for descriptor in leaked:
+            held = now - self._outstanding[descriptor.index][1]
+            self.logger.warning(f"Leaked audio slab {descriptor.index} ({descriptor.source or descriptor.name}), "
+                                f"held for {held:.1f}s")
+
+        for shm in self.slabs + list(self._oversize.values()):
+            _close(shm)
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._oversize.clear()
+        self.returns.close()
+        self.closed = True
+        return leaked
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SlabReader:
+    """Consumer side: NumPy views onto slabs, and release back to the pool"""
+
+    def __init__(self, returns, own_tracker=False):
+        self.returns = returns
+        self.own_tracker = own_tracker
+        self._attached = {}
+
+    def __getstate__(self):
+        return {'returns': self.returns, 'own_tracker': self.own_tracker}
+
+    def __setstate__(self, state):
+        self.returns = state['returns']
+        self.own_tracker = state['own_tracker']
+        self._attached = {}
+
+    def view(self, descriptor):
+        """Read-only view of the clip; valid until release()"""
+        # Pool slabs are reused, so they stay mapped after the first attach
+        shm = self._attached.get(descriptor.name)
+        if shm is None:
+            shm = _attach(descriptor.name, self.own_tracker)
+            self._attached[descriptor.name] = shm
+        array = np.ndarray((descriptor.length,), dtype=np.dtype(descriptor.dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        return array
+
+    def release(self, descriptor):
+        """Hand the slab back to the producer; views of it must no longer be used"""
+        if descriptor.oversize:
+            shm = self._attached.pop(descriptor.name, None)
+            if shm is not None:
+                _close(shm)
+        self.returns.put(descriptor.index)
+
+    def close(self):
+        for shm in self._attached.values():
+            _close(shm)
+        self._attached.clear()
+
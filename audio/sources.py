@@ -0,0 +1,246 @@
+import time
+import wave
+import threading
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+# pyaudio.paContinue, so callbacks can answer PyAudio without importing it
+CONTINUE = 0
+
+
+class AudioSource:
+    """
+    Produces 16-bit mono PCM and hands it to a PyAudio-style callback:
+    callback(in_data, frame_count, time_info, status)
+    """
+
+    def start(self, callback):
+        raise NotImplementedError
+
+    def is_active(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """Live microphone input through a PyAudio input stream"""
+
+    def __init__(self, rate=16000, channels=1, chunk=1024, audio=None):
+        import pyaudio
+        self.rate = rate
+        self.channels = channels
+        self.chunk = chunk
+        # Terminate PyAudio on close only if we created it
+        self.owns_audio = audio is None
+        self.audio = audio or pyaudio.PyAudio()
+        self.format = pyaudio.paInt16
+        self.stream = None
+
+    def start(self, callback):
+        self.stream = self.audio.open(
+            format=self.format,
+            channels=self.channels,
+            rate=self.rate,
+            input=True,
+            frames_per_buffer=self.chunk,
+            stream_callback=callback
+        )
+        self.stream.start_stream()
+
+    def is_active(self):
+        return self.stream is not None and self.stream.is_active()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.owns_audio:
+            self.audio.terminate()
+
+
+class FileReplaySource(AudioSource):
+    """
+    Replays 16kHz mono 16-bit WAV files through the same callback as the
+    microphone, for load testing without sound hardware.
+
+    speed: 1.0 for real time, N for N-times real time, or None to go as
+        fast as the consumer allows (ready() is polled before every chunk).
+    silence_seconds: silence injected before each file.
+    noise_level: standard deviation of added white noise, as a fraction of
+        full scale (e.g. 0.01).
+    """
+
+    def __init__(self, audio_files, rate=16000, chunk=1024, speed=1.0, silence_seconds=0.0,
+                 noise_level=0.0, ready=None, seed=0):
+        self.audio_files = [Path(audio_file) for audio_file in audio_files]
+        self.rate = rate
+        self.chunk = chunk
+        self.speed = speed
+        self.silence_seconds = silence_seconds
+        self.noise_level = noise_level
+        self.ready = ready
+        self.rng = np.random.default_rng(seed)
+
+        self.samples_fed = 0
+        self.files_replayed = 0
+        self.started_at = None
+        self.finished_at = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self, callback):
+        self._stop.clear()
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, args=(callback,), daemon=True)
+        self._thread.start()
+
+    def is_active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    @property
+    def audio_seconds(self):
+        return self.samples_fed / self.rate
+
+    def _run(self, callback):
+        try:
+            for audio_file in self.audio_files:
+                if self._stop.is_set():
+                    break
+                if self.silence_seconds > 0:
+                    silence = np.zeros(int(self.rate * self.silence_seconds), dtype=np.int16)
+                    if not self._feed(callback, silence):
+                        break
+                try:
+                    samples = self._read_wav(audio_file)
+                except (OSError, ValueError, wave.Error) as e:
+                    print(f"Skipping {audio_file}: {e}")
+                    continue
+                if not self._feed(callback, samples):
+                    break
+                self.files_replayed += 1
+        finally:
+            self.finished_at = time.monotonic()
+
+    def _read_wav(self, audio_file):
+        with wave.open(str(audio_file), 'rb') as wf:
+            if wf.getframerate() != self.rate or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                raise ValueError(f"expected {self.rate}Hz mono 16-bit WAV")
+            return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+    def _feed(self, callback, samples):
+        for offset in range(0, len(samples), self.chunk):
+            if self._stop.is_set():
+                return False
+
+            block = samples[offset:offset + self.chunk]
+            if self.noise_level > 0:
+                noise = self.rng.normal(0.0, self.noise_level * 32767, len(block))
+                block = np.clip(block.astype(np.float64) + noise, -32768, 32767).astype(np.int16)
+
+            self._pace()
+            callback(block.tobytes(), len(block), None, 0)
+            self.samples_fed += len(block)
+        return True
+
+    def _pace(self):
+        if self.speed is None:
+            # Consumer-paced: wait until it is ready for more audio
+            while self.ready is not None and not self.ready() and not self._stop.is_set():
+                time.sleep(0.005)
+            return
+        due = self.started_at + self.samples_fed / (self.rate * self.speed)
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CaptureClock:
+    """
+    Maps a sample position in the stream to the monotonic time it was
+    captured, from the arrival times of recent callback blocks. Used for
+    wall-clock caption lag, which stays correct when a replay runs faster
+    than real time.
+    """
+
+    def __init__(self, rate, blocks=256):
+        self.rate = rate
+        self._blocks = deque(maxlen=blocks)
+
+    def record(self, samples_received):
+        """Call from the audio callback after counting the new block"""
+        self._blocks.append((samples_received, time.monotonic()))
+
+    def time_of(self, sample_index):
+        blocks = list(self._blocks)
+        if not blocks:
+            return time.monotonic()
+        for block_end, arrived in blocks:
+            if block_end >= sample_index:
+                break
+        # A block arrives once its last sample has been captured
+        return arrived - (block_end - sample_index) / self.rate
+
+
+class ReplayReport:
+    """Caption lag, dropped audio and CPU cost of a replay run"""
+
+    def __init__(self):
+        self.caption_lags = []
+        self.cpu_start = time.process_time()
+        self.wall_start = time.monotonic()
+
+    def record_caption(self, lag_seconds):
+        self.caption_lags.append(lag_seconds)
+
+    def finish(self, audio_seconds, dropped_seconds):
+        cpu_seconds = time.process_time() - self.cpu_start
+        wall_seconds = time.monotonic() - self.wall_start
+        audio_hours = audio_seconds / 3600.0
+        lags = sorted(self.caption_lags)
+
+        def pct(p):
+            if not lags:
+                return None
+            return lags[min(len(lags) - 1, max(0, int(np.ceil(p / 100.0 * len(lags))) - 1))]
+
+        return {
+            'audio_seconds': audio_seconds,
+            'wall_seconds': wall_seconds,
+            'captions': len(lags),
+            'caption_lag_p50': pct(50),
+            'caption_lag_p95': pct(95),
+            'caption_lag_max': lags[-1] if lags else None,
+            'dropped_seconds': dropped_seconds,
+            'dropped_per_hour': dropped_seconds / audio_hours if audio_hours else 0.0,
+            'cpu_seconds': cpu_seconds,
+            'cpu_seconds_per_hour': cpu_seconds / audio_hours if audio_hours else 0.0,
+        }
+
+    @staticmethod
+    def print_report(report):
+        print("\nReplay report")
+        print(f"  Audio replayed:     {report['audio_seconds']:.1f}s in {report['wall_seconds']:.1f}s wall")
+        if report['captions']:
+            print(f"  Caption lag:        p50 {report['caption_lag_p50']:.2f}s, "
+                  f"p95 {report['caption_lag_p95']:.2f}s, max {report['caption_lag_max']:.2f}s "
+                  f"({report['captions']} captions)")
+        else:
+            print("  Caption lag:        no captions")
+        print(f"  Dropped audio:      {report['dropped_seconds']:.1f}s "
+              f"({report['dropped_per_hour']:.1f}s per replayed hour)")
+        print(f"  CPU time:           {report['cpu_seconds']:.1f}s "
+              f"({report['cpu_seconds_per_hour']:.1f}s per replayed hour)")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Whisper Speech-to-Text Benchmarks
+"""
+
+import argparse
+import time
+import multiprocessing
+from pathlib import Path
+import numpy as np
+from audio.features import FeatureCache
+from models.whisper_model import WhisperModel
+from config.runtime import apply, plan
+from audio.shared_memory import SlabPool
+from config.settings import AUDIO_DIR, DEFAULT_MODEL, WHISPER_MODELS, DECODE_PROFILES, SUPPORTED_FORMATS
+
+def find_audio_files(input_path):
+    """Collect audio files from a file or directory"""
+    input_path = Path(input_path)
+    if input_path.is_file():
+        return [input_path]
+    audio_files = []
+    for ext in SUPPORTED_FORMATS:
+        audio_files.extend(input_path.glob(f"*{ext}"))
+    return sorted(audio_files)
+
+def warm_up(model, language, decode_profile=None):
+    """One untimed decode so one-time torch setup is not charged to the first configuration"""
+    model.transcribe(np.zeros(16000, dtype=np.float32), language=language or "en",
+                     decode_profile=decode_profile)
+
+def benchmark_decode_profiles(args):
+    """Compare throughput of the decoding profiles on the same audio"""
+    audio_files = find_audio_files(args.input)
+    if not audio_files:
+        print(f"No audio files found in {args.input}")
+        return
+
+    # One shared feature cache so every profile decodes from identical, precomputed features
+    feature_cache = FeatureCache()
+    model = WhisperModel(args.model, feature_cache=feature_cache)
+    for audio_file in audio_files:
+        feature_cache.log_mel(audio_file, model.n_mels)
+
+    language = args.language if args.language != "auto" else None
+    warm_up(model, language)
+    print(f"Model: {args.model}, files: {len(audio_files)}, repeats: {args.repeats}")
+    print(f"{'profile':<10}{'audio (s)':>12}{'decode (s)':>12}{'x realtime':>12}  strategies")
+
+    for profile in args.profiles:
+        audio_seconds = 0.0
+        decode_seconds = 0.0
+        strategies = {}
+        for _ in range(args.repeats):
+            for audio_file in audio_files:
+                started = time.perf_counter()
+                result = model.transcribe(audio_file, language=language, decode_profile=profile)
+                decode_seconds += time.perf_counter() - started
+                audio_seconds += result['duration']
+                for strategy, count in result['strategies'].items():
+                    strategies[strategy] = strategies.get(strategy, 0) + count
+
+        speed = audio_seconds / decode_seconds if decode_seconds else 0.0
+        print(f"{profile:<10}{audio_seconds:>12.1f}{decode_seconds:>12.2f}{speed:>12.1f}  {strategies}")
+
+def default_thread_counts(cores):
+    """1, 2, 4, ... up to the available cores"""
+    counts = []
+    n = 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    counts.append(cores)
+    return counts
+
+def benchmark_threads(args):
+    """Sweep intra-op thread counts / core sets for one engine's runtime plan"""
+    audio_files = find_audio_files(args.input)
+    if not audio_files:
+        print(f"No audio files found in {args.input}")
+        return
+
+    base_plan = plan(args.engine, reserve_live=args.reserve_live_cores)
+    cpus = base_plan['cpus']
+    thread_counts = args.threads or default_thread_counts(min(len(cpus), base_plan['available_cores']))
+
+    feature_cache = FeatureCache()
+    model = WhisperModel(args.model, feature_cache=feature_cache)
+    for audio_file in audio_files:
+        feature_cache.log_mel(audio_file, model.n_mels)
+
+    language = args.language if args.language != "auto" else None
+    print(f"Model: {args.model}, engine: {args.engine}, CPUs: {cpus}, "
+          f"available cores: {base_plan['available_cores']}")
+    print(f"{'threads':>8}{'pinned':>8}{'audio (s)':>12}{'decode (s)':>12}{'x realtime':>12}")
+
+    for threads in thread_counts:
+        for pinned in ([True, False] if args.compare_affinity else [True]):
+            runtime_plan = dict(base_plan, intra_op_threads=threads,
+                                cpus=cpus[:threads] if pinned else cpus)
+            apply(runtime_plan)
+            warm_up(model, language, args.profile)
+
+            audio_seconds = 0.0
+            decode_seconds = 0.0
+            for _ in range(args.repeats):
+                for audio_file in audio_files:
+                    started = time.perf_counter()
+                    result = model.transcribe(audio_file, language=language, decode_profile=args.profile)
+                    decode_seconds += time.perf_counter() - started
+                    audio_seconds += result['duration']
+
+            speed = audio_seconds / decode_seconds if decode_seconds else 0.0
+            print(f"{threads:>8}{'yes' if pinned else 'no':>8}{audio_seconds:>12.1f}"
+                  f"{decode_seconds:>12.2f}{speed:>12.1f}")
+
+def _pickled_consumer(clips, done):
+    """Receive clips as pickled arrays"""
+    total = 0.0
+    while True:
+        audio = clips.get()
+        if audio is None:
+            break
+        total += float(audio[::160].sum())
+    done.put(total)
+
+def _shared_memory_consumer(reader, descriptors, done):
+    """Receive clips as slab descriptors and read them in place"""
+    total = 0.0
+    while True:
+        descriptor = descriptors.get()
+        if descriptor is None:
+            break
+        audio = reader.view(descriptor)
+        total += float(audio[::160].sum())
+        del audio
+        reader.release(descriptor)
+    reader.close()
+    done.put(total)
+
+def benchmark_transport(args):
+    """Compare pickled vs shared-memory hand-off of decoded audio between processes"""
+    rate = 16000
+    samples = int(args.seconds * rate)
+    audio = np.random.default_rng(0).standard_normal(samples).astype(np.float32)
+    clip_mb = audio.nbytes / (1024 * 1024)
+    print(f"{args.clips} clips of {args.seconds:.0f}s ({clip_mb:.1f} MB each)")
+    print(f"{'transport':<15}{'total (s)':>12}{'per clip (ms)':>15}{'MB/s':>10}")
+
+    # Pickled: every clip is serialized through a pipe
+    clips = multiprocessing.Queue(maxsize=args.slabs)
+    done = multiprocessing.Queue()
+    consumer = multiprocessing.Process(target=_pickled_consumer, args=(clips, done))
+    consumer.start()
+    started = time.perf_counter()
+    for _ in range(args.clips):
+        clips.put(audio)
+    clips.put(None)
+    done.get()
+    elapsed = time.perf_counter() - started
+    consumer.join()
+    print(f"{'pickle':<15}{elapsed:>12.2f}{elapsed / args.clips * 1000:>15.1f}"
+          f"{clip_mb * args.clips / elapsed:>10.0f}")
+
+    # Shared memory: samples are written once into a slab, only the descriptor crosses the pipe
+    with SlabPool(samples, count=args.slabs, sample_rate=rate) as pool:
+        descriptors = multiprocessing.Queue()
+        done = multiprocessing.Queue()
+        consumer = multiprocessing.Process(target=_shared_memory_consumer,
+                                           args=(pool.reader, descriptors, done))
+        consumer.start()
+        started = time.perf_counter()
+        for i in range(args.clips):
+            descriptor, slab = pool.acquire(samples, source=f"clip{i}")
+            # Stands in for AudioProcessor.load_audio_into decoding into the slab
+            slab[:] = audio
+            del slab
+            descriptors.put(descriptor)
+        descriptors.put(None)
+        done.get()
+        elapsed = time.perf_counter() - started
+        consumer.join()
+    print(f"{'shared memory':<15}{elapsed:>12.2f}{elapsed / args.clips * 1000:>15.1f}"
+          f"{clip_mb * args.clips / elapsed:>10.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper Speech-to-Text Benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    decode_parser = subparsers.add_parser("decode", help="Compare decoding profile throughput")
+    decode_parser.add_argument("input", nargs="?", default=str(AUDIO_DIR),
+                               help="Audio file or directory (default: test_audio)")
+    decode_parser.add_argument("-m", "--model", default=DEFAULT_MODEL,
+                               choices=list(WHISPER_MODELS.keys()),
+                               help="Whisper model size")
+    decode_parser.add_argument("-l", "--language", default="en",
+                               help="Audio language (en, es, fr, etc.)")
+    decode_parser.add_argument("-p", "--profiles", nargs="+", default=list(DECODE_PROFILES.keys()),
+                               choices=list(DECODE_PROFILES.keys()),
+                               help="Decoding profiles to compare")
+    decode_parser.add_argument("-r", "--repeats", type=int, default=1,
+                               help="Passes over the audio per profile")
+    decode_parser.set_defaults(func=benchmark_decode_profiles)
+
+    threads_parser = subparsers.add_parser("threads", help="Sweep inference thread counts and CPU affinity")
+    threads_parser.add_argument("input", nargs="?", default=str(AUDIO_DIR),
+                                help="Audio file or directory (default: test_audio)")
+    threads_parser.add_argument("-m", "--model", default=DEFAULT_MODEL,
+                                choices=list(WHISPER_MODELS.keys()),
+                                help="Whisper model size")
+    threads_parser.add_argument("-l", "--language", default="en",
+                                help="Audio language (en, es, fr, etc.)")
+    threads_parser.add_argument("-e", "--engine", default="batch", choices=["batch", "live", "stt_tts"],
+                                help="Engine whose core set is swept")
+    threads_parser.add_argument("-t", "--threads", type=int, nargs="+",
+                                help="Thread counts to try (default: 1, 2, 4, ... available cores)")
+    threads_parser.add_argument("--reserve-live-cores", type=int,
+                                help="Cores reserved for live captioning while planning")
+    threads_parser.add_argument("--compare-affinity", action="store_true",
+                                help="Also run each thread count without pinning to a core subset")
+    threads_parser.add_argument("-p", "--profile", default="fast", choices=list(DECODE_PROFILES.keys()),
+                                help="Decoding profile")
+    threads_parser.add_argument("-r", "--repeats", type=int, default=1,
+                                help="Passes over the audio per setting")
+    threads_parser.set_defaults(func=benchmark_threads)
+
+    transport_parser = subparsers.add_parser("transport",
+                                             help="Compare pickled vs shared-memory audio hand-off")
+    transport_parser.add_argument("-s", "--seconds", type=float, default=600.0,
+                                  help="Length of each synthetic clip in seconds")
+    transport_parser.add_argument("-n", "--clips", type=int, default=20,
+                                  help="Number of clips to transfer")
+    transport_parser.add_argument("--slabs", type=int, default=4,
+                                  help="Shared-memory slabs (and pickled queue depth)")
+    transport_parser.set_defaults(func=benchmark_transport)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import os
+import math
+import logging
+from pathlib import Path
+
+from .settings import RUNTIME_THREADS, INTEROP_THREADS, LIVE_RESERVED_CORES
+
+logger = logging.getLogger(__name__)
+
+# Engines that create Whisper models
+ENGINES = ("batch", "live", "stt_tts")
+
+
+def allowed_cpus():
+    """CPU ids this process may run on (respects taskset/cpusets)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cgroup_cpu_limit():
+    """CPU quota from cgroup v2 (cpu.max) or v1 (cfs quota/period), or None if unlimited"""
+    cpu_max = Path("/sys/fs/cgroup/cpu.max")
+    try:
+        if cpu_max.exists():
+            quota, period = cpu_max.read_text().split()[:2]
+            if quota == "max":
+                return None
+            return int(quota) / int(period)
+
+        quota_file = Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period_file = Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if quota_file.exists() and period_file.exists():
+            quota = int(quota_file.read_text())
+            if quota <= 0:
+                return None
+            return quota / int(period_file.read_text())
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cores():
+    """Number of cores we can actually use: affinity mask capped by the cgroup quota"""
+    cores = len(allowed_cpus())
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cores = min(cores, max(1, math.floor(limit)))
+    return cores
+
+
+def plan(engine, threads=None, reserve_live=None):
+    """
+    Work out thread counts and a core set for an engine.
+
+    With reserve_live > 0 the last reserve_live allowed cores belong to the
+    live captioning path and every other engine is kept off them, so a
+    batch job on the same host cannot starve live captions.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+
+    cpus = allowed_cpus()
+    usable = available_cores()
+    reserve_live = LIVE_RESERVED_CORES if reserve_live is None else reserve_live
+    # Always leave at least one core for the other engines
+    reserve_live = max(0, min(reserve_live, len(cpus) - 1))
+
+    if reserve_live:
+        live_cpus = cpus[-reserve_live:]
+        other_cpus = cpus[:-reserve_live]
+        core_set = live_cpus if engine == "live" else other_cpus
+    else:
+        core_set = cpus
+
+    if threads is None:
+        threads = RUNTIME_THREADS.get(engine)
+    if threads is None:
+        threads = min(len(core_set), usable)
+
+    return {
+        'engine': engine,
+        'intra_op_threads': max(1, threads),
+        'inter_op_threads': INTEROP_THREADS,
+        'cpus': core_set,
+        'available_cores': usable,
+    }
+
+
+def apply(runtime_plan):
+    """Pin the process to the planned cores and set torch/OpenMP thread counts"""
+    threads = runtime_plan['intra_op_threads']
+
+    # Picked up by OpenMP/MKL in this process (if not yet initialized) and in children
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, runtime_plan['cpus'])
+        except OSError as e:
+            logger.warning(f"Could not set CPU affinity: {e}")
+
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(runtime_plan['inter_op_threads'])
+    except RuntimeError:
+        # Only allowed once, before any inter-op parallel work has started
+        pass
+
+    logger.info(
+        f"Runtime for {runtime_plan['engine']}: {threads} intra-op / "
+        f"{runtime_plan['inter_op_threads']} inter-op threads on CPUs {runtime_plan['cpus']} "
+        f"({runtime_plan['available_cores']} cores available)"
+    )
+    return runtime_plan
+
+
+def configure_runtime(engine, threads=None, reserve_live=None):
+    """Plan and apply the runtime configuration for an engine; call before loading models"""
+    return apply(plan(engine, threads=threads, reserve_live=reserve_live))
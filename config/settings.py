@@ -6,16 +6,17 @@ PROJECT_ROOT = Path(__file__).parent.parent
 MODELS_DIR = PROJECT_ROOT / "models"
 AUDIO_DIR = PROJECT_ROOT / "test_audio"
 OUTPUT_DIR = PROJECT_ROOT / "outputs"
+TRANSCRIPT_DB = OUTPUT_DIR / "transcripts.db"  # Indexed transcript store
 
 # Model settings
 WHISPER_MODELS = {
-    "tiny": {"size": "39M", "vram": "~1GB", "langs": "99"},
-    "base": {"size": "74M", "vram": "~1GB", "langs": "99"},
-    "small": {"size": "244M", "vram": "~2GB", "langs": "99"},
-    "medium": {"size": "769M", "vram": "~5GB", "langs": "99"},
-    "large": {"size": "1550M", "vram": "~10GB", "langs": "99"},
-    "large-v2": {"size": "1550M", "vram": "~10GB", "langs": "99"},
-    "large-v3": {"size": "1550M", "vram": "~10GB", "langs": "99"}
+    "tiny": {"size": "39M", "vram": "~1GB", "langs": "99", "n_mels": 80},
+    "base": {"size": "74M", "vram": "~1GB", "langs": "99", "n_mels": 80},
+    "small": {"size": "244M", "vram": "~2GB", "langs": "99", "n_mels": 80},
+    "medium": {"size": "769M", "vram": "~5GB", "langs": "99", "n_mels": 80},
+    "large": {"size": "1550M", "vram": "~10GB", "langs": "99", "n_mels": 80},
+    "large-v2": {"size": "1550M", "vram": "~10GB", "langs": "99", "n_mels": 80},
+    "large-v3": {"size": "1550M", "vram": "~10GB", "langs": "99", "n_mels": 128}
 }
 
 DEFAULT_MODEL = "base"  # Change to "large-v3" for best accuracy
@@ -29,4 +30,30 @@ SUPPORTED_FORMATS = ['.wav', '.mp3', '.m4a', '.flac', '.ogg']
 # Transcription settings
 DEFAULT_LANGUAGE = "en"  # None for auto-detection
 TEMPERATURE = 0.0  # 0.0 for most deterministic
-BEAM_SIZE = 5
\ No newline at end of file
+BEAM_SIZE = 5
+
+# Language ID (used when language is auto-detected)
+LANGUAGE_PROBE_SECONDS = 10.0  # Seconds of detected speech used for detection
+LANGUAGE_CONFIDENCE_THRESHOLD = 0.8  # Minimum probability to reuse a decision for a whole directory
+
+# Decoding profiles: attempts tried in order for each 30s window until one
+# passes the compression-ratio / log-probability checks
+FALLBACK_TEMPERATURES = (0.2, 0.4, 0.6, 0.8, 1.0)
+DECODE_PROFILES = {
+    # Greedy first; beam search only for windows that fail the checks
+    "fast": [{"temperature": 0.0}, {"temperature": 0.0, "beam_size": 5}]
+            + [{"temperature": t, "best_of": 5} for t in FALLBACK_TEMPERATURES],
+    "balanced": [{"temperature": 0.0, "beam_size": 5}]
+                + [{"temperature": t, "best_of": 5} for t in FALLBACK_TEMPERATURES],
+    "accurate": [{"temperature": 0.0, "beam_size": 8, "patience": 2.0}]
+                + [{"temperature": t, "best_of": 8} for t in FALLBACK_TEMPERATURES],
+}
+
+# Inference runtime settings (None = derive from available cores / cgroup quota)
+RUNTIME_THREADS = {"batch": None, "live": None, "stt_tts": None}
+INTEROP_THREADS = 1
+LIVE_RESERVED_CORES = int(os.environ.get("STT_LIVE_RESERVED_CORES", 0))  # Cores kept for live captioning
+
+# Feature cache settings
+FEATURE_CACHE_BYTES = 512 * 1024 * 1024  # In-memory log-mel LRU budget
+FEATURE_CACHE_DIR = None  # e.g. OUTPUT_DIR / "features" to persist memory-mapped .npy features
\ No newline at end of file
@@ -7,7 +7,8 @@ import argparse
 import logging
 from pathlib import Path
 from transcription.batch_transcription import BatchTranscriber
-from config.settings import DEFAULT_MODEL, WHISPER_MODELS
+from transcription.store import TranscriptStore
+from config.settings import DEFAULT_MODEL, WHISPER_MODELS, DECODE_PROFILES, TRANSCRIPT_DB
 
 def setup_logging():
     """Setup logging configuration"""
@@ -27,30 +28,49 @@ def main():
                        choices=list(WHISPER_MODELS.keys()),
                        help="Whisper model size")
     parser.add_argument("-l", "--language", default="en",
-                       help="Audio language (en, es, fr, etc.)")
-    parser.add_argument("-f", "--format", default="txt",
-                       choices=["txt", "json", "srt"],
-                       help="Output format")
+                       help="Audio language (en, es, fr, etc.) or 'auto'")
+    parser.add_argument("--language-scope", default="directory", choices=["directory", "file", "none"],
+                       help="With --language auto: reuse one detection per directory, per file, "
+                            "or let every decode detect on its own")
+    parser.add_argument("-f", "--format", nargs="*", default=["txt"],
+                       choices=["txt", "json", "jsonl", "srt"],
+                       help="Output format(s), all written from one transcription pass "
+                            "(pass -f with no formats to only write to --store)")
+    parser.add_argument("--threads", type=int,
+                       help="Intra-op inference threads (default: available cores)")
+    parser.add_argument("--reserve-live-cores", type=int,
+                       help="Keep this many cores free for live captioning on the same host")
+    parser.add_argument("--store", nargs="?", const=str(TRANSCRIPT_DB),
+                       help=f"Index results in a searchable SQLite store (default: {TRANSCRIPT_DB})")
     parser.add_argument("--temperature", type=float, default=0.0,
                        help="Sampling temperature")
     parser.add_argument("--beam-size", type=int, default=5,
                        help="Beam size for decoding")
+    parser.add_argument("--decode-profile", choices=list(DECODE_PROFILES.keys()),
+                       help="Decoding profile (overrides --temperature/--beam-size); "
+                            "'fast' decodes greedily and uses beam search only on fallback")
     
     args = parser.parse_args()
+    if not args.format and not args.store:
+        parser.error("-f with no formats writes nothing; give at least one format or use --store")
     
     setup_logging()
     logger = logging.getLogger(__name__)
     
     # Initialize transcriber
     logger.info(f"Initializing Whisper {args.model} model...")
-    transcriber = BatchTranscriber(model_size=args.model)
+    store = TranscriptStore(args.store) if args.store else None
+    transcriber = BatchTranscriber(model_size=args.model, decode_profile=args.decode_profile, store=store,
+                                   threads=args.threads, reserve_live=args.reserve_live_cores,
+                                   language_scope=args.language_scope)
     
     # Transcription options
     options = {
-        "language": args.language if args.language != "auto" else None,
-        "temperature": args.temperature,
-        "beam_size": args.beam_size
+        "language": args.language if args.language != "auto" else None
     }
+    if args.decode_profile is None:
+        options["temperature"] = args.temperature
+        options["beam_size"] = args.beam_size
     
     input_path = Path(args.input)
     
@@ -63,14 +83,14 @@ def main():
                 **options
             )
             if result:
-                logger.info(f"✓ Transcription completed: {output_file}")
+                logger.info(f"✓ Transcription completed: {', '.join(result['output_files'].values()) or args.store}")
                 print(f"Text: {result['text']}")
             else:
                 logger.error("Transcription failed")
         
         elif input_path.is_dir():
             # Directory transcription
-            results = transcriber.transcribe_directory(input_path, **options)
+            results = transcriber.transcribe_directory(input_path, output_format=args.format, **options)
             logger.info(f"✓ Processed {len(results)} files")
             for result in results:
                 print(f"File: {result['input_file']}")
@@ -82,6 +102,9 @@ def main():
     
     except Exception as e:
         logger.error(f"Error: {e}")
+    finally:
+        if store is not None:
+            store.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,258 @@
+import time
+import logging
+from pathlib import Path
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_FRAMES, HOP_LENGTH, SAMPLE_RATE, pad_or_trim
+from whisper.decoding import DecodingOptions
+from whisper.tokenizer import get_tokenizer
+
+from audio.features import FeatureCache, get_default_feature_cache, speech_probe
+from config.settings import MODELS_DIR, DECODE_PROFILES
+
+
+class WhisperModel:
+    """
+    Whisper model wrapper that decodes from cached log-mel features.
+
+    Features come from a FeatureCache, so temperature-fallback retries and
+    re-runs with other model sizes never recompute the spectrogram.
+    """
+
+    def __init__(self, model_size="base", device=None, feature_cache=None):
+        self.model_size = model_size
+        self.logger = logging.getLogger(__name__)
+        self.feature_cache = feature_cache or get_default_feature_cache()
+
+        local_path = MODELS_DIR / f"{model_size}.pt"
+        self.model = whisper.load_model(str(local_path) if local_path.exists() else model_size, device=device)
+        self.device = str(self.model.device)
+        self.n_mels = self.model.dims.n_mels
+
+        # Seconds per timestamp token
+        self.input_stride = N_FRAMES // self.model.dims.n_audio_ctx
+        self.time_precision = self.input_stride * HOP_LENGTH / SAMPLE_RATE
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0,
+                   beam_size=None, best_of=None, compression_ratio_threshold=2.4,
+                   logprob_threshold=-1.0, no_speech_threshold=0.6,
+                   condition_on_previous_text=True, fp16=None, decode_profile=None, on_segment=None):
+        """
+        Transcribe an audio file path or a 16kHz waveform
+
+        temperature may be a single value or a sequence used for fallback
+        when a window fails the compression-ratio or log-probability checks.
+        decode_profile (see DECODE_PROFILES) replaces temperature, beam_size
+        and best_of with a fixed list of attempts, e.g. greedy first and beam
+        search only on fallback. Each segment records the strategy used.
+        on_segment, if given, is called with each segment as soon as its
+        30-second window has been decoded.
+        """
+        start_time = time.time()
+
+        mel = self.load_features(audio)
+
+        if fp16 is None:
+            fp16 = self.device != "cpu"
+        dtype = torch.float16 if fp16 else torch.float32
+        if decode_profile is not None:
+            if decode_profile not in DECODE_PROFILES:
+                raise ValueError(f"Unknown decode profile: {decode_profile}")
+            attempts = DECODE_PROFILES[decode_profile]
+        else:
+            temperatures = (temperature,) if isinstance(temperature, (int, float)) else tuple(temperature)
+            attempts = [
+                {'temperature': t, 'beam_size': beam_size} if t == 0 else {'temperature': t, 'best_of': best_of}
+                for t in temperatures
+            ]
+
+        content_frames = mel.shape[-1] - N_FRAMES
+
+        language_probability = None
+        if language is None:
+            language, language_probability = self.detect_language(mel)
+
+        tokenizer = get_tokenizer(
+            self.model.is_multilingual,
+            num_languages=self.model.num_languages,
+            language=language,
+            task=task,
+        )
+
+        seek = 0
+        all_tokens = []
+        prompt_reset_since = 0
+        segments = []
+
+        while seek < content_frames:
+            time_offset = seek * HOP_LENGTH / SAMPLE_RATE
+            segment_size = min(N_FRAMES, content_frames - seek)
+            segment_duration = segment_size * HOP_LENGTH / SAMPLE_RATE
+            mel_segment = self._mel_window(mel, seek, dtype)
+
+            options = {
+                'task': task,
+                'language': language,
+                'fp16': fp16,
+                'prompt': all_tokens[prompt_reset_since:] if condition_on_previous_text else None,
+            }
+            result, strategy = self._decode_with_fallback(
+                mel_segment, attempts, options,
+                compression_ratio_threshold, logprob_threshold, no_speech_threshold,
+            )
+
+            if (no_speech_threshold is not None and result.no_speech_prob > no_speech_threshold
+                    and (logprob_threshold is None or result.avg_logprob < logprob_threshold)):
+                # Silent window
+                seek += segment_size
+                continue
+
+            tokens = torch.tensor(result.tokens)
+            window_segments, seek_advance = self._split_segments(tokens, tokenizer, time_offset,
+                                                                 segment_size, segment_duration)
+            for window_segment in window_segments:
+                window_segment.update({
+                    'id': len(segments),
+                    'seek': seek,
+                    'temperature': result.temperature,
+                    'strategy': strategy,
+                    'avg_logprob': result.avg_logprob,
+                    'compression_ratio': result.compression_ratio,
+                    'no_speech_prob': result.no_speech_prob,
+                })
+                segments.append(window_segment)
+                if on_segment is not None:
+                    on_segment(window_segment)
+            seek += seek_advance
+
+            all_tokens.extend(result.tokens)
+            if not condition_on_previous_text or result.temperature > 0.5:
+                prompt_reset_since = len(all_tokens)
+
+        strategies = {}
+        for segment in segments:
+            strategies[segment['strategy']] = strategies.get(segment['strategy'], 0) + 1
+
+        return {
+            'text': "".join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': language,
+            'language_probability': language_probability,
+            'duration': content_frames * HOP_LENGTH / SAMPLE_RATE,
+            'decode_profile': decode_profile,
+            'strategies': strategies,
+            'processing_time': time.time() - start_time,
+            'model_info': {
+                'model_size': self.model_size,
+                'device': self.device,
+                'n_mels': self.n_mels,
+            },
+        }
+
+    def _mel_window(self, mel, seek, dtype):
+        window = np.ascontiguousarray(mel[:, seek:seek + N_FRAMES])
+        window = pad_or_trim(torch.from_numpy(window), N_FRAMES)
+        return window.to(self.model.device).to(dtype)
+
+    def load_features(self, audio):
+        """Cached padded log-mel features for a file path, or computed for a waveform"""
+        if isinstance(audio, (str, Path)):
+            return self.feature_cache.log_mel(audio, self.n_mels)
+        return FeatureCache.compute(audio, self.n_mels)
+
+    def detect_language(self, mel, probe_seconds=10.0):
+        """Detect the language from a short speech-only probe; returns (language, probability)"""
+        if not self.model.is_multilingual:
+            return "en", 1.0
+        dtype = torch.float16 if self.device != "cpu" else torch.float32
+        probe = self._mel_window(speech_probe(mel, probe_seconds), 0, dtype)
+        _, probs = self.model.detect_language(probe)
+        language = max(probs, key=probs.get)
+        self.logger.info(f"Detected language: {language} ({probs[language]:.2f})")
+        return language, probs[language]
+
+    def _decode_with_fallback(self, mel_segment, attempts, options,
+                              compression_ratio_threshold, logprob_threshold, no_speech_threshold):
+        """Try each decoding attempt in order; returns the result and the strategy that produced it"""
+        result = None
+        strategy = None
+        for attempt in attempts:
+            kwargs = dict(options)
+            kwargs.update(attempt)
+            kwargs = {k: v for k, v in kwargs.items() if v is not None}
+
+            result = self.model.decode(mel_segment, DecodingOptions(**kwargs))
+            strategy = self._strategy_name(attempt)
+
+            needs_fallback = False
+            if compression_ratio_threshold is not None and result.compression_ratio > compression_ratio_threshold:
+                needs_fallback = True
+            if logprob_threshold is not None and result.avg_logprob < logprob_threshold:
+                needs_fallback = True
+            # Only a window that is both likely silent and low-confidence is accepted as
+            # silence; a confident hallucination over silence still falls back
+            if (no_speech_threshold is not None and result.no_speech_prob > no_speech_threshold
+                    and logprob_threshold is not None and result.avg_logprob < logprob_threshold):
+                needs_fallback = False
+            if not needs_fallback:
+                break
+        return result, strategy
+
+    @staticmethod
+    def _strategy_name(attempt):
+        if attempt.get('temperature', 0.0) > 0:
+            return f"sample@{attempt['temperature']:g}"
+        if attempt.get('beam_size'):
+            return f"beam{attempt['beam_size']}"
+        return "greedy"
+
+    def _split_segments(self, tokens, tokenizer, time_offset, segment_size, segment_duration):
+        """Split a window's tokens on timestamp pairs; returns segments and frames consumed"""
+        timestamp_begin = tokenizer.timestamp_begin
+        timestamp_tokens = tokens.ge(timestamp_begin)
+        single_timestamp_ending = timestamp_tokens[-2:].tolist() == [False, True]
+        consecutive = torch.where(timestamp_tokens[:-1] & timestamp_tokens[1:])[0] + 1
+
+        segments = []
+        if len(consecutive) > 0:
+            slices = consecutive.tolist()
+            if single_timestamp_ending:
+                slices.append(len(tokens))
+
+            last_slice = 0
+            for current_slice in slices:
+                sliced_tokens = tokens[last_slice:current_slice]
+                start_pos = sliced_tokens[0].item() - timestamp_begin
+                end_pos = sliced_tokens[-1].item() - timestamp_begin
+                segments.append(self._segment(tokenizer, sliced_tokens,
+                                              time_offset + start_pos * self.time_precision,
+                                              time_offset + end_pos * self.time_precision))
+                last_slice = current_slice
+
+            if single_timestamp_ending:
+                seek_advance = segment_size
+            else:
+                last_timestamp_pos = tokens[last_slice - 1].item() - timestamp_begin
+                seek_advance = last_timestamp_pos * self.input_stride
+        else:
+            duration = segment_duration
+            timestamps = tokens[timestamp_tokens.nonzero().flatten()]
+            if len(timestamps) > 0 and timestamps[-1].item() != timestamp_begin:
+                duration = (timestamps[-1].item() - timestamp_begin) * self.time_precision
+            segments.append(self._segment(tokenizer, tokens, time_offset, time_offset + duration))
+            seek_advance = segment_size
+
+        segments = [segment for segment in segments if segment['text'].strip()]
+        return segments, max(seek_advance, 1)
+
+    def _segment(self, tokenizer, tokens, start, end):
+        tokens = tokens.tolist()
+        text_tokens = [token for token in tokens if token < tokenizer.eot]
+        return {
+            'start': start,
+            'end': end,
+            'text': tokenizer.decode(text_tokens),
+            'tokens': tokens,
+        }
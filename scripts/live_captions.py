@@ -1,37 +1,150 @@
 import whisper
-import pyaudio
 import wave
 import threading
 import time
 import numpy as np
 import tempfile
 import os
+import sys
+import argparse
 from collections import deque
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from config.runtime import configure_runtime
+from audio.sources import MicrophoneSource, FileReplaySource, ReplayReport, CaptureClock, CONTINUE
+
+# Model registry, ordered from fastest to most accurate
+MODEL_PATHS = {
+    'tiny': '../models/tiny.pt',
+    'base': '../models/base.pt',
+    'small': '../models/small.pt',
+    'medium': '../models/medium.pt',
+    'large': '../models/large-v3.pt'
+}
+
+class RealTimeController:
+    """
+    Adapts the captioning window, polling interval and decoder to keep
+    caption lag bounded.
+
+    Every transcription call reports how much audio it covered, how long
+    decoding took and how much audio is still waiting. The controller keeps
+    a smoothed real-time factor (decode time / audio time) and:
+      - grows the window when decoding is slow (Whisper pads every call to
+        30s, so per-call cost is nearly flat and longer windows amortize it),
+      - shrinks it again when there is headroom, to lower latency,
+      - on the first call over the latency SLO, turns off temperature
+        fallback (no re-decoding of hard windows at higher temperatures),
+      - when lag stays above the SLO, steps down to the next smaller model.
+
+    The window never exceeds the SLO, since the oldest sample in a window
+    already waits the whole window before it is decoded.
+    """
+    def __init__(self, model_size, window=3.0, min_window=2.0, max_window=8.0,
+                 latency_slo=5.0, patience=3, smoothing=0.3):
+        self.model_size = model_size
+        self.window = window
+        self.max_window = min(max_window, latency_slo)
+        self.min_window = min(min_window, self.max_window)
+        self.window = min(self.window, self.max_window)
+        self.latency_slo = latency_slo
+        self.patience = patience
+        self.smoothing = smoothing
+        
+        self.rtf = None
+        self.fallback = True
+        self.lag = 0.0
+        self.slo_misses = 0
+    
+    def log(self, message):
+        timestamp = time.strftime("%H:%M:%S")
+        print(f"[{timestamp}] [rtf-controller] {message}")
+    
+    def record(self, audio_seconds, decode_seconds, backlog_seconds):
+        """
+        Record one transcription call. backlog_seconds is the audio waiting
+        once the decode has finished, so it already includes the audio that
+        arrived while decoding.
+        Returns a smaller model size to switch to, or None.
+        """
+        rtf = decode_seconds / max(audio_seconds, 1e-6)
+        if self.rtf is None:
+            self.rtf = rtf
+        else:
+            self.rtf = self.smoothing * rtf + (1 - self.smoothing) * self.rtf
+        
+        # The first sample of the window waited for the window to fill, then until
+        # now; everything captured since the window closed is the backlog
+        self.lag = audio_seconds + backlog_seconds
+        
+        if self.rtf > 0.8 and self.window < self.max_window:
+            self.window = min(self.max_window, self.window + 1.0)
+            self.log(f"RTF {self.rtf:.2f}: growing window to {self.window:.1f}s")
+        elif self.rtf < 0.3 and self.window > self.min_window:
+            self.window = max(self.min_window, self.window - 0.5)
+            self.log(f"RTF {self.rtf:.2f}: shrinking window to {self.window:.1f}s")
+        
+        if self.lag <= self.latency_slo:
+            self.slo_misses = 0
+            return None
+        
+        if self.fallback:
+            # Cheap and immediate; does not count against the model's patience
+            self.fallback = False
+            self.log(f"lag {self.lag:.1f}s > SLO {self.latency_slo:.1f}s: disabling temperature fallback")
+            return None
+        
+        self.slo_misses += 1
+        if self.slo_misses < self.patience:
+            return None
+        self.slo_misses = 0
+        
+        smaller = self.smaller_model()
+        if smaller is None:
+            self.log(f"lag {self.lag:.1f}s > SLO {self.latency_slo:.1f}s: already on smallest model")
+            return None
+        
+        self.log(f"lag {self.lag:.1f}s > SLO {self.latency_slo:.1f}s: "
+                 f"switching model {self.model_size} -> {smaller}")
+        self.model_size = smaller
+        self.rtf = None
+        return smaller
+    
+    def smaller_model(self):
+        sizes = list(MODEL_PATHS)
+        index = sizes.index(self.model_size) if self.model_size in sizes else 0
+        return sizes[index - 1] if index > 0 else None
+    
+    def max_backlog(self):
+        """Audio older than this is skipped so lag cannot grow without bound"""
+        return self.latency_slo + self.window
+    
+    def poll_interval(self, pending_seconds):
+        """Sleep until the next window should be full"""
+        return min(1.0, max(0.05, self.window - pending_seconds))
+    
+    def decode_options(self):
+        if not self.fallback:
+            # A single greedy pass instead of whisper's 0.0-1.0 temperature ladder
+            return {"temperature": 0.0}
+        return {}
 
 class LiveCaptioning:
-    def __init__(self, model_size="base"):
+    def __init__(self, model_size="base", adaptive=True, latency_slo=5.0, audio_source=None):
         """
         Initialize the live captioning system
         model_size: 'tiny', 'base', 'small', 'medium', 'large' (base recommended for CPU)
+        adaptive: adapt window, polling and model to keep caption lag below latency_slo seconds
+        audio_source: where audio comes from (default: microphone via PyAudio)
         """
-        print("Loading Whisper model...")
-        
-        # Map model sizes to local file paths
-        model_paths = {
-            'tiny': '../models/tiny.pt',
-            'base': '../models/base.pt',
-            'small': '../models/small.pt',
-            'medium': '../models/medium.pt',
-            'large': '../models/large-v3.pt'
-        }
-        
-        model_path = model_paths.get(model_size, 'models/base.pt')
-        self.model = whisper.load_model(model_path)
-        print(f"Whisper {model_size} model loaded successfully from {model_path}!")
+        # Runs on the reserved cores when STT_LIVE_RESERVED_CORES is set
+        self.runtime = configure_runtime("live")
+        self.load_model(model_size)
         
         # Audio settings
         self.CHUNK = 1024
-        self.FORMAT = pyaudio.paInt16
         self.CHANNELS = 1
         self.RATE = 16000  # Whisper works best with 16kHz
         self.RECORD_SECONDS = 3  # Process every 3 seconds
@@ -40,20 +153,40 @@ class LiveCaptioning:
         self.audio_buffer = deque(maxlen=int(self.RATE * 10))  # 10 second buffer
         self.is_recording = False
         
-        # PyAudio setup
-        self.audio = pyaudio.PyAudio()
+        # Sample counters: everything received and everything transcribed so far
+        self.samples_received = 0
+        self.samples_consumed = 0
+        self.samples_dropped = 0
+        self.last_chunk_end = 0
+        self.buffer_lock = threading.Lock()
+        self.capture_clock = CaptureClock(self.RATE)
+        # True while a chunk is being fetched and transcribed
+        self.decoding = False
+        # Set by replay(speed=None): the source refills the window at once
+        self.consumer_paced = False
+        
+        self.controller = RealTimeController(
+            model_size, window=self.RECORD_SECONDS, latency_slo=latency_slo
+        ) if adaptive else None
+        
+        # Audio input (the microphone is opened on start if no source is given)
+        self.audio_source = audio_source
+        self.report = None
+    
+    def load_model(self, model_size):
+        """Load (or swap to) a Whisper model from the local registry"""
+        print("Loading Whisper model...")
+        model_path = MODEL_PATHS.get(model_size, 'models/base.pt')
+        self.model = whisper.load_model(model_path)
+        self.model_size = model_size
+        print(f"Whisper {model_size} model loaded successfully from {model_path}!")
         
     def start_audio_stream(self):
         """Start the audio input stream"""
         try:
-            self.stream = self.audio.open(
-                format=self.FORMAT,
-                channels=self.CHANNELS,
-                rate=self.RATE,
-                input=True,
-                frames_per_buffer=self.CHUNK,
-                stream_callback=self.audio_callback
-            )
+            if self.audio_source is None:
+                self.audio_source = MicrophoneSource(self.RATE, self.CHANNELS, self.CHUNK)
+            self.audio_source.start(self.audio_callback)
             print("Audio stream started successfully!")
             return True
         except Exception as e:
@@ -66,18 +199,36 @@ class LiveCaptioning:
         audio_data = np.frombuffer(in_data, dtype=np.int16)
         
         # Add to buffer
-        self.audio_buffer.extend(audio_data)
+        with self.buffer_lock:
+            self.audio_buffer.extend(audio_data)
+            self.samples_received += len(audio_data)
+            self.capture_clock.record(self.samples_received)
         
-        return (in_data, pyaudio.paContinue)
+        return (in_data, CONTINUE)
     
-    def get_audio_chunk(self):
-        """Get audio chunk for processing"""
-        if len(self.audio_buffer) < self.RATE * self.RECORD_SECONDS:
-            return None
+    def get_audio_chunk(self, flush=False):
+        """Get the next untranscribed audio chunk for processing (flush: also return a final partial chunk)"""
+        chunk_size = int(self.RATE * self.window_seconds())
+        
+        with self.buffer_lock:
+            # Skip audio that fell out of the buffer or is older than the backlog limit
+            oldest = self.samples_received - len(self.audio_buffer)
+            if self.controller:
+                oldest = max(oldest, self.samples_received - int(self.RATE * self.controller.max_backlog()))
+            if self.samples_consumed < oldest:
+                self.samples_dropped += oldest - self.samples_consumed
+                self.samples_consumed = oldest
+            
+            pending = self.samples_received - self.samples_consumed
+            if pending < chunk_size:
+                if not flush or pending == 0:
+                    return None
+                chunk_size = pending
             
-        # Get last N seconds of audio
-        chunk_size = int(self.RATE * self.RECORD_SECONDS)
-        audio_chunk = list(self.audio_buffer)[-chunk_size:]
+            start = len(self.audio_buffer) - pending
+            audio_chunk = list(islice(self.audio_buffer, start, start + chunk_size))
+            self.samples_consumed += chunk_size
+            self.last_chunk_end = self.samples_consumed
         
         # Convert to numpy array and normalize
         audio_array = np.array(audio_chunk, dtype=np.float32)
@@ -85,6 +236,13 @@ class LiveCaptioning:
         
         return audio_array
     
+    def window_seconds(self):
+        return self.controller.window if self.controller else self.RECORD_SECONDS
+    
+    def pending_seconds(self):
+        """Seconds of received audio not yet transcribed"""
+        return (self.samples_received - self.samples_consumed) / self.RATE
+    
     def transcribe_audio(self, audio_data):
         """Transcribe audio using Whisper"""
         try:
@@ -94,7 +252,8 @@ class LiveCaptioning:
                 language="en",  # Set to English for better performance
                 task="transcribe",
                 fp16=False,  # Set to False for CPU
-                verbose=False
+                verbose=False,
+                **(self.controller.decode_options() if self.controller else {})
             )
             
             return result["text"].strip()
@@ -102,6 +261,14 @@ class LiveCaptioning:
             print(f"Transcription error: {e}")
             return ""
     
+    def update_controller(self, audio_seconds, decode_seconds):
+        """Feed decode timing to the controller and apply its decisions"""
+        if not self.controller:
+            return
+        smaller = self.controller.record(audio_seconds, decode_seconds, self.pending_seconds())
+        if smaller:
+            self.load_model(smaller)
+    
     def start_live_captioning(self):
         """Main function to start live captioning"""
         print("\n" + "="*50)
@@ -115,26 +282,41 @@ class LiveCaptioning:
             return
         
         self.is_recording = True
-        self.stream.start_stream()
         
         try:
             while self.is_recording:
-                # Get audio chunk
-                audio_chunk = self.get_audio_chunk()
+                # Get audio chunk (a finished source is drained, then we stop)
+                source_done = not self.audio_source.is_active()
+                self.decoding = True
+                audio_chunk = self.get_audio_chunk(flush=source_done)
+                if audio_chunk is None and source_done:
+                    break
                 
                 if audio_chunk is not None:
                     # Check if there's actually audio (not silence)
                     if np.max(np.abs(audio_chunk)) > 0.01:  # Threshold for silence detection
                         # Transcribe
+                        started = time.monotonic()
                         text = self.transcribe_audio(audio_chunk)
+                        self.update_controller(len(audio_chunk) / self.RATE, time.monotonic() - started)
+                        if self.report:
+                            # Wall-clock time since the end of this caption's audio was captured
+                            self.report.record_caption(
+                                time.monotonic() - self.capture_clock.time_of(self.last_chunk_end))
                         
                         if text and len(text.strip()) > 0:
                             # Display with timestamp
                             timestamp = time.strftime("%H:%M:%S")
                             print(f"[{timestamp}] {text}")
+                self.decoding = False
                 
                 # Small delay to prevent excessive CPU usage
-                time.sleep(1)
+                if self.consumer_paced:
+                    time.sleep(0.01)
+                elif self.controller:
+                    time.sleep(self.controller.poll_interval(self.pending_seconds()))
+                else:
+                    time.sleep(1)
                 
         except KeyboardInterrupt:
             print("\n\nStopping live captioning...")
@@ -145,14 +327,57 @@ class LiveCaptioning:
         """Stop the captioning system"""
         self.is_recording = False
         
-        if hasattr(self, 'stream'):
-            self.stream.stop_stream()
-            self.stream.close()
+        if self.audio_source is not None:
+            self.audio_source.close()
         
-        self.audio.terminate()
+        if self.samples_dropped:
+            print(f"Skipped {self.samples_dropped / self.RATE:.1f}s of audio to keep up with real time.")
         print("Live captioning stopped.")
 
+    def replay(self, audio_files, speed=1.0, silence_seconds=0.0, noise_level=0.0):
+        """
+        Drive live captioning from WAV files instead of the microphone and
+        report caption lag, dropped audio and CPU use per replayed hour.
+        speed=None replays as fast as transcription keeps up: the next window
+        is only fed while the decoder is idle, so replay pacing never shows up
+        as backlog to the controller.
+        """
+        self.audio_source = FileReplaySource(
+            audio_files, rate=self.RATE, chunk=self.CHUNK, speed=speed,
+            silence_seconds=silence_seconds, noise_level=noise_level,
+            ready=lambda: not self.decoding and self.pending_seconds() < self.window_seconds()
+        )
+        self.report = ReplayReport()
+        self.consumer_paced = speed is None
+        self.start_live_captioning()
+        
+        report = self.report.finish(self.audio_source.audio_seconds, self.samples_dropped / self.RATE)
+        ReplayReport.print_report(report)
+        return report
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Live Captioning System")
+    parser.add_argument("--replay", nargs="+", metavar="WAV",
+                       help="Replay 16kHz mono WAV files instead of using the microphone")
+    parser.add_argument("-m", "--model", choices=list(MODEL_PATHS.keys()),
+                       help="Whisper model size (prompted if omitted)")
+    parser.add_argument("--speed", default="1",
+                       help="Replay rate: 1 for real time, N for N-times, or 'max' for as fast as possible")
+    parser.add_argument("--silence", type=float, default=0.0,
+                       help="Seconds of silence injected before each replayed file")
+    parser.add_argument("--noise", type=float, default=0.0,
+                       help="White noise level added to replayed audio (fraction of full scale)")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    
+    if args.replay:
+        speed = None if args.speed == "max" else float(args.speed)
+        captioner = LiveCaptioning(model_size=args.model or 'base')
+        captioner.replay(args.replay, speed=speed, silence_seconds=args.silence, noise_level=args.noise)
+        return
+    
     print("Live Captioning System")
     print("======================")
     
@@ -165,18 +390,20 @@ def main():
         '5': 'large'    # Best accuracy, very slow
     }
     
-    print("\nChoose Whisper model size:")
-    print("1. Tiny (fastest)")
-    print("2. Base (recommended for CPU)")
-    print("3. Small (better accuracy)")
-    print("4. Medium (high accuracy, slower)")
-    print("5. Large (best accuracy, very slow)")
-    
-    choice = input("\nEnter choice (1-5) [default: 2]: ").strip()
-    if choice not in model_choices:
-        choice = '2'
-    
-    model_size = model_choices[choice]
+    if args.model:
+        model_size = args.model
+    else:
+        print("\nChoose Whisper model size:")
+        print("1. Tiny (fastest)")
+        print("2. Base (recommended for CPU)")
+        print("3. Small (better accuracy)")
+        print("4. Medium (high accuracy, slower)")
+        print("5. Large (best accuracy, very slow)")
+        
+        choice = input("\nEnter choice (1-5) [default: 2]: ").strip()
+        if choice not in model_choices:
+            choice = '2'
+        model_size = model_choices[choice]
     print(f"\nUsing {model_size} model...")
     
     # Initialize and start live captioning
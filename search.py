@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Search indexed transcripts
+"""
+
+import argparse
+import sqlite3
+from pathlib import Path
+from transcription.store import TranscriptStore
+from config.settings import TRANSCRIPT_DB
+
+def quote_terms(query):
+    """Turn free text into an FTS5 query that matches each word literally"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the transcript store")
+    parser.add_argument("query", help="Words or phrase to find (FTS5 syntax, e.g. '\"budget review\"')")
+    parser.add_argument("--db", default=str(TRANSCRIPT_DB),
+                       help="Transcript store path")
+    parser.add_argument("-n", "--limit", type=int, default=20,
+                       help="Maximum number of segments to return")
+    parser.add_argument("-m", "--model",
+                       help="Only match transcripts from this model")
+    parser.add_argument("--file",
+                       help="Only match files LIKE this pattern (e.g. '%%/meetings/%%')")
+    
+    args = parser.parse_args()
+    if not args.query.strip():
+        parser.error("query must not be empty")
+    
+    if not Path(args.db).exists():
+        print(f"Transcript store not found: {args.db}")
+        return
+    
+    store = TranscriptStore(args.db)
+    try:
+        try:
+            matches = store.search(args.query, limit=args.limit, model=args.model, file_pattern=args.file)
+        except sqlite3.OperationalError as e:
+            # Plain text such as "can't" is not valid FTS5 syntax; search for the words as typed
+            print(f"Not a valid FTS5 query ({e}); searching for the words literally.")
+            print("Use double quotes for phrases, e.g. '\"budget review\"'.")
+            try:
+                matches = store.search(quote_terms(args.query), limit=args.limit, model=args.model,
+                                       file_pattern=args.file)
+            except sqlite3.OperationalError as e:
+                print(f"Search failed: {e}")
+                return
+        for match in matches:
+            print(f"{match['file']} [{match['start_ms']}-{match['end_ms']} ms] ({match['model']}): {match['snippet']}")
+        print(f"{len(matches)} matching segment(s)")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import whisper
-import pyaudio
 import numpy as np
 import time
 import os
@@ -7,11 +6,22 @@ import subprocess
 import json
 from collections import deque
 from pathlib import Path
+from stt_tts_tracing import LatencyTracer, NullTrace
+from stt_tts_playback import StreamingTTS, AUDIO_SINKS
+from config.runtime import configure_runtime
+from audio.sources import MicrophoneSource, FileReplaySource, ReplayReport, CaptureClock, CONTINUE
 
 class STTTTSSystem:
-    def __init__(self):
+    def __init__(self, trace_file=None, audio_source=None):
         # Load configuration
         self.load_config()
+        audio_output = self.config.get('audio_output', 'pyaudio')
+        if audio_output not in AUDIO_SINKS:
+            raise ValueError(f"Unknown audio_output '{audio_output}' in stt_tts_config.json "
+                             f"(expected one of: {', '.join(AUDIO_SINKS)})")
+        
+        # Thread counts and CPU affinity for inference
+        self.runtime = configure_runtime("stt_tts", threads=self.config.get('threads'))
         
         # Initialize Whisper
         print(f"Loading Whisper {self.config['whisper_model']} model...")
@@ -20,7 +30,6 @@ class STTTTSSystem:
         
         # Audio settings
         self.CHUNK = 1024
-        self.FORMAT = pyaudio.paInt16
         self.CHANNELS = 1
         self.RATE = 16000
         self.RECORD_SECONDS = 3
@@ -28,15 +37,42 @@ class STTTTSSystem:
         # Audio buffer
         self.audio_buffer = deque(maxlen=int(self.RATE * 10))
         self.is_recording = False
+        # Maps a sample back to when it was captured
+        self.capture_clock = CaptureClock(self.RATE)
+        self.silence_threshold = 0.01
+        
+        # Sample accounting: received, covered by a processed chunk, and where the last chunk ended
+        self.samples_received = 0
+        self.samples_covered = 0
+        self.last_chunk_end = 0
+        self.last_chunk_start = 0
+        
+        # Latency tracing (spans go to trace_file as JSONL if given)
+        self.tracer = LatencyTracer(trace_file or self.config.get('trace_file'))
+        self.trace = NullTrace()
         
-        # PyAudio setup
-        self.audio = pyaudio.PyAudio()
+        # PyAudio is only needed for speaker output and the microphone, so a replay
+        # with audio_output "null" runs without PortAudio installed
+        self.audio = None
+        if audio_output == "pyaudio":
+            import pyaudio
+            self.audio = pyaudio.PyAudio()
+        self.audio_source = audio_source
         
         # TTS setup
         self.piper_path = Path(self.config['piper_tts_path'])
         self.output_dir = self.piper_path / "output"
         self.output_dir.mkdir(exist_ok=True)
         
+        # Streaming TTS: raw PCM from Piper straight to an output stream
+        piper_name = "piper.exe" if os.name == 'nt' else "piper"
+        self.streaming_tts = StreamingTTS(
+            self.config.get('piper_executable', self.piper_path / "piper_models" / "piper" / piper_name),
+            self.config.get('piper_model', self.piper_path / "piper_models" / "en_US-lessac-medium.onnx"),
+            sink_factory=AUDIO_SINKS[audio_output],
+            audio=self.audio
+        )
+        
     def load_config(self):
         """Load configuration from JSON file"""
         try:
@@ -50,14 +86,9 @@ class STTTTSSystem:
     def start_audio_stream(self):
         """Start audio input stream"""
         try:
-            self.stream = self.audio.open(
-                format=self.FORMAT,
-                channels=self.CHANNELS,
-                rate=self.RATE,
-                input=True,
-                frames_per_buffer=self.CHUNK,
-                stream_callback=self.audio_callback
-            )
+            if self.audio_source is None:
+                self.audio_source = MicrophoneSource(self.RATE, self.CHANNELS, self.CHUNK, audio=self.audio)
+            self.audio_source.start(self.audio_callback)
             print("Audio stream started successfully!")
             return True
         except Exception as e:
@@ -68,21 +99,39 @@ class STTTTSSystem:
         """Audio stream callback"""
         audio_data = np.frombuffer(in_data, dtype=np.int16)
         self.audio_buffer.extend(audio_data)
-        return (in_data, pyaudio.paContinue)
+        self.samples_received += len(audio_data)
+        self.capture_clock.record(self.samples_received)
+        return (in_data, CONTINUE)
     
-    def get_audio_chunk(self):
-        """Get audio chunk for processing"""
-        if len(self.audio_buffer) < self.RATE * self.RECORD_SECONDS:
-            return None
-            
+    def get_audio_chunk(self, flush=False):
+        """Get audio chunk for processing (flush: a final partial chunk of audio not yet processed)"""
         chunk_size = int(self.RATE * self.RECORD_SECONDS)
+        received = self.samples_received
+        if flush:
+            # Only the tail after the last chunk; earlier audio was already transcribed
+            chunk_size = min(chunk_size, received - self.last_chunk_end)
+            if chunk_size <= 0:
+                return None
+        elif len(self.audio_buffer) < chunk_size:
+            return None
+        
         audio_chunk = list(self.audio_buffer)[-chunk_size:]
         
+        # Audio that arrived since the last chunk but is older than this one was never heard
+        self.samples_covered += min(chunk_size, received - self.last_chunk_end)
+        self.last_chunk_end = received
+        self.last_chunk_start = received - len(audio_chunk)
+        
         audio_array = np.array(audio_chunk, dtype=np.float32)
         audio_array = audio_array / 32768.0
         
         return audio_array
     
+    def speech_end_time(self, audio_chunk):
+        """Capture time of the last above-threshold sample in the chunk"""
+        loud = np.flatnonzero(np.abs(audio_chunk) > self.silence_threshold)
+        return self.capture_clock.time_of(self.last_chunk_start + loud[-1] + 1)
+    
     def transcribe_audio(self, audio_data):
         """Transcribe audio using Whisper"""
         try:
@@ -113,6 +162,16 @@ class STTTTSSystem:
         if not text:
             return False
         
+        if self.config.get('tts_streaming', True) and self.streaming_tts.available():
+            try:
+                success = self.streaming_tts.speak(text, trace=self.trace)
+            except Exception as e:
+                print(f"Streaming TTS error: {e}")
+                return False
+            if not success:
+                print(f"TTS error: {self.streaming_tts.last_error}")
+            return success
+        
         try:
             # Create output filename
             timestamp = time.strftime("%Y%m%d_%H%M%S")
@@ -137,18 +196,20 @@ class STTTTSSystem:
                 ]
             
             # Execute TTS command
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                cwd=str(self.piper_path),
-                timeout=30
-            )
+            with self.trace.span("tts_synthesis", chars=len(text)):
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    cwd=str(self.piper_path),
+                    timeout=30
+                )
             
             if result.returncode == 0 and output_file.exists():
                 print(f"TTS audio generated: {output_file.name}")
                 # Play the audio
-                self.play_audio(output_file)
+                with self.trace.span("playback"):
+                    self.play_audio(output_file)
                 return True
             else:
                 print(f"TTS error: {result.stderr}")
@@ -182,38 +243,15 @@ class STTTTSSystem:
             return
         
         self.is_recording = True
-        self.stream.start_stream()
         
         try:
             while self.is_recording:
-                # Get audio chunk
-                audio_chunk = self.get_audio_chunk()
+                transcribed_text = self.process_audio_chunk()
                 
-                if audio_chunk is not None:
-                    # Check for actual audio (not silence)
-                    if np.max(np.abs(audio_chunk)) > 0.01:
-                        # Transcribe
-                        transcribed_text = self.transcribe_audio(audio_chunk)
-                        
-                        if transcribed_text and len(transcribed_text.strip()) > 0:
-                            timestamp = time.strftime("%H:%M:%S")
-                            print(f"[{timestamp}] You said: {transcribed_text}")
-                            
-                            # Generate response
-                            response_text = self.generate_response(transcribed_text)
-                            
-                            if response_text:
-                                print(f"[{timestamp}] Response: {response_text}")
-                                
-                                # Convert to speech
-                                success = self.text_to_speech(response_text)
-                                if not success:
-                                    print("TTS failed")
-                                
-                                # Check for exit commands
-                                if any(word in transcribed_text.lower() for word in ["stop", "exit", "quit"]):
-                                    print("Exit command detected. Stopping...")
-                                    break
+                # Check for exit commands
+                if transcribed_text and any(word in transcribed_text.lower() for word in ["stop", "exit", "quit"]):
+                    print("Exit command detected. Stopping...")
+                    break
                 
                 # Small delay
                 time.sleep(1)
@@ -223,6 +261,95 @@ class STTTTSSystem:
         finally:
             self.stop_system()
     
+    def process_audio_chunk(self, speak=True, flush=False):
+        """Run one buffered chunk through STT -> response -> TTS, tracing each stage"""
+        fetched = time.monotonic()
+        
+        # Get audio chunk
+        audio_chunk = self.get_audio_chunk(flush=flush)
+        
+        # Check for actual audio (not silence)
+        if audio_chunk is None or np.max(np.abs(audio_chunk)) <= self.silence_threshold:
+            return None
+        
+        # Both spans start when the speaker stopped, so the wait for the
+        # window to fill and the polling delay are part of the latency
+        speech_end = min(self.speech_end_time(audio_chunk), fetched)
+        self.trace = self.tracer.start_utterance(speech_end)
+        try:
+            self.trace.add_span("buffer_wait", speech_end, fetched)
+            
+            # Transcribe
+            with self.trace.span("transcribe", audio_seconds=len(audio_chunk) / self.RATE):
+                transcribed_text = self.transcribe_audio(audio_chunk)
+            
+            if not transcribed_text or len(transcribed_text.strip()) == 0:
+                return None
+            
+            timestamp = time.strftime("%H:%M:%S")
+            print(f"[{timestamp}] You said: {transcribed_text}")
+            
+            # Generate response
+            with self.trace.span("generate_response"):
+                response_text = self.generate_response(transcribed_text)
+            
+            if response_text:
+                print(f"[{timestamp}] Response: {response_text}")
+                
+                # Convert to speech
+                if speak:
+                    success = self.text_to_speech(response_text)
+                    if not success:
+                        print("TTS failed")
+            
+            self.trace.finish()
+            return transcribed_text
+        finally:
+            self.trace = NullTrace()
+    
+    def replay_mode(self, audio_files, speak=True, speed=None, silence_seconds=0.0, noise_level=0.0):
+        """
+        Headless run: feed 16kHz mono WAV files through the same callback and
+        processing path as the microphone. speed=None replays as fast as
+        processing keeps up; 1.0 is real time. Reports caption lag, dropped
+        audio and CPU use per replayed hour, plus the per-stage latency summary.
+        """
+        chunk_samples = int(self.RATE * self.RECORD_SECONDS)
+        self.audio_source = FileReplaySource(
+            audio_files, rate=self.RATE, chunk=self.CHUNK, speed=speed,
+            silence_seconds=silence_seconds, noise_level=noise_level,
+            ready=lambda: self.samples_received - self.last_chunk_end < chunk_samples
+        )
+        report = ReplayReport()
+        
+        if not self.start_audio_stream():
+            return None
+        
+        try:
+            while True:
+                source_done = not self.audio_source.is_active()
+                pending = self.samples_received - self.last_chunk_end
+                if pending >= chunk_samples or (source_done and pending > 0):
+                    chunk_end = self.last_chunk_end
+                    if self.process_audio_chunk(speak=speak, flush=source_done):
+                        # Wall-clock time since the end of this utterance's audio was captured
+                        report.record_caption(time.monotonic() - self.capture_clock.time_of(self.last_chunk_end))
+                    if self.last_chunk_end == chunk_end:
+                        # Less than one chunk of audio in total; nothing more will arrive
+                        break
+                elif source_done:
+                    break
+                else:
+                    time.sleep(0.01)
+        finally:
+            self.audio_source.close()
+            result = report.finish(self.samples_received / self.RATE,
+                                   (self.samples_received - self.samples_covered) / self.RATE)
+            ReplayReport.print_report(result)
+            self.tracer.print_summary()
+            self.tracer.close()
+        return result
+    
     def batch_mode(self):
         """Process audio files in batch"""
         audio_dir = input("Enter directory path containing audio files: ").strip()
@@ -276,11 +403,13 @@ class STTTTSSystem:
         """Stop the system"""
         self.is_recording = False
         
-        if hasattr(self, 'stream'):
-            self.stream.stop_stream()
-            self.stream.close()
+        if self.audio_source is not None:
+            self.audio_source.close()
         
-        self.audio.terminate()
+        if self.audio is not None:
+            self.audio.terminate()
+        self.tracer.print_summary()
+        self.tracer.close()
         print("System stopped.")
 
 def main():
@@ -298,11 +427,20 @@ def main():
     print("\nChoose mode:")
     print("1. Interactive mode (live STT-TTS)")
     print("2. Batch process audio files")
+    print("3. Replay WAV files (headless latency run)")
     
-    choice = input("\nEnter choice (1-2) [default: 1]: ").strip()
+    choice = input("\nEnter choice (1-3) [default: 1]: ").strip()
     
     if choice == '2':
         system.batch_mode()
+    elif choice == '3':
+        audio_dir = input("Enter directory path containing WAV files: ").strip()
+        if not audio_dir or not os.path.isdir(audio_dir):
+            print("Invalid directory path")
+            return
+        speed = input("Replay speed (1 = real time, N = N-times, max) [max]: ").strip().lower()
+        speed = None if speed in ('', 'max') else float(speed)
+        system.replay_mode(sorted(Path(audio_dir).glob("*.wav")), speed=speed)
     else:
         system.interactive_mode()
 
@@ -0,0 +1,192 @@
+import re
+import json
+import time
+import threading
+import subprocess
+from pathlib import Path
+
+# Split after sentence punctuation followed by whitespace
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def split_sentences(text):
+    """Split response text into sentences for incremental synthesis"""
+    return [sentence.strip() for sentence in SENTENCE_END.split(text) if sentence.strip()]
+
+
+class PyAudioSink:
+    """Plays 16-bit mono PCM through a PyAudio output stream"""
+
+    def __init__(self, audio, sample_rate):
+        import pyaudio
+        self.stream = audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=sample_rate,
+            output=True
+        )
+        self.first_write_time = None
+
+    def write(self, pcm):
+        if self.first_write_time is None:
+            self.first_write_time = time.monotonic()
+        self.stream.write(pcm)
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+
+
+class NullAudioSink:
+    """Discards PCM but records what would have been played (headless runs)"""
+
+    def __init__(self, audio=None, sample_rate=22050):
+        self.sample_rate = sample_rate
+        self.bytes_written = 0
+        self.first_write_time = None
+        self.closed = False
+
+    def write(self, pcm):
+        if self.first_write_time is None:
+            self.first_write_time = time.monotonic()
+        self.bytes_written += len(pcm)
+
+    def close(self):
+        self.closed = True
+
+    @property
+    def seconds_written(self):
+        return self.bytes_written / 2 / self.sample_rate
+
+
+AUDIO_SINKS = {
+    "pyaudio": PyAudioSink,
+    "null": NullAudioSink,
+}
+
+
+class StreamingTTS:
+    """
+    Sentence-chunked Piper synthesis played straight from raw PCM.
+
+    One Piper process is started per response with --output-raw. Each
+    sentence goes to it on its own line, so Piper emits the first
+    sentence's audio while later ones are still queued, and that audio is
+    written to the sink as it arrives without touching the filesystem.
+    """
+
+    READ_SIZE = 4096
+
+    def __init__(self, piper_executable, model_path, sink_factory=PyAudioSink, audio=None):
+        self.piper_executable = Path(piper_executable)
+        self.model_path = Path(model_path)
+        self.sink_factory = sink_factory
+        self.audio = audio
+        self.sample_rate = self._read_sample_rate()
+        self.last_sink = None
+        # Piper's stderr from the last failed speak(), for error reporting
+        self.last_error = None
+
+    def _read_sample_rate(self):
+        config_file = self.model_path.with_name(self.model_path.name + ".json")
+        try:
+            with open(config_file, "r", encoding="utf-8") as f:
+                return json.load(f)["audio"]["sample_rate"]
+        except (OSError, KeyError, ValueError):
+            return 22050
+
+    def available(self):
+        return self.piper_executable.exists() and self.model_path.exists()
+
+    def speak(self, text, trace=None):
+        """Synthesize and play text; returns True if any audio was played"""
+        sentences = split_sentences(text)
+        if not sentences:
+            return False
+
+        started = time.monotonic()
+        self.last_error = None
+        # Open the output first: if there is no output device, no Piper process is left behind
+        sink = self.sink_factory(self.audio, self.sample_rate)
+        self.last_sink = sink
+        try:
+            process = subprocess.Popen(
+                [str(self.piper_executable), "--model", str(self.model_path), "--output-raw"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except OSError:
+            sink.close()
+            raise
+
+        # Piper logs progress to stderr; drain it so the pipe never fills
+        stderr_chunks = []
+
+        def drain_stderr():
+            for line in process.stderr:
+                stderr_chunks.append(line)
+
+        stderr_reader = threading.Thread(target=drain_stderr, daemon=True)
+        stderr_reader.start()
+
+        # Feed sentences from a thread so a full stdout pipe can't deadlock us
+        def feed():
+            try:
+                for sentence in sentences:
+                    process.stdin.write((sentence + "\n").encode("utf-8"))
+                    process.stdin.flush()
+            except (BrokenPipeError, OSError):
+                pass
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+
+        remainder = b""
+        first_audio = True
+        try:
+            while True:
+                data = process.stdout.read1(self.READ_SIZE)
+                if not data:
+                    synthesis_end = time.monotonic()
+                    break
+                if first_audio and trace is not None:
+                    trace.add_span("tts_first_audio", started, time.monotonic(),
+                                   sentences=len(sentences))
+                first_audio = False
+                # Keep writes aligned to whole 16-bit samples
+                data = remainder + data
+                cut = len(data) - (len(data) % 2)
+                remainder = data[cut:]
+                if cut:
+                    sink.write(data[:cut])
+        finally:
+            sink.close()
+            feeder.join(timeout=1)
+            process.stdout.close()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            stderr_reader.join(timeout=1)
+            process.stderr.close()
+
+        if trace is not None:
+            # Same stage names as the WAV path: synthesis runs until Piper's output ends,
+            # playback from the first sample written until the sink has drained
+            trace.add_span("tts_synthesis", started, synthesis_end, chars=len(text),
+                           sentences=len(sentences))
+            if sink.first_write_time is not None:
+                trace.add_span("playback", sink.first_write_time, time.monotonic(),
+                               sentences=len(sentences))
+        success = process.returncode == 0 and sink.first_write_time is not None
+        if not success:
+            stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace").strip()
+            self.last_error = stderr or f"piper exited with code {process.returncode} and no audio"
+        return success
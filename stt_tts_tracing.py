@@ -0,0 +1,132 @@
+import json
+import math
+import time
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+STAGES = ["buffer_wait", "transcribe", "generate_response", "tts_synthesis", "tts_first_audio", "playback", "end_to_end"]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class UtteranceTrace:
+    """Monotonic stage timestamps for one utterance"""
+
+    def __init__(self, tracer, utterance_id, speech_end):
+        self.tracer = tracer
+        self.utterance_id = utterance_id
+        self.speech_end = speech_end
+        self.wall_time = time.time()
+        self.spans = []
+        self.attributes = {}
+
+    @contextmanager
+    def span(self, stage, **attributes):
+        """Time a stage of the pipeline"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_span(stage, start, time.monotonic(), **attributes)
+
+    def add_span(self, stage, start, end, **attributes):
+        span = {
+            'utterance': self.utterance_id,
+            'stage': stage,
+            'start': start,
+            'end': end,
+            'duration_ms': (end - start) * 1000.0,
+        }
+        span.update(attributes)
+        self.spans.append(span)
+        self.tracer.record(span)
+
+    def finish(self, **attributes):
+        """Close the utterance with an end-to-end span from end of speech"""
+        self.attributes.update(attributes)
+        self.add_span("end_to_end", self.speech_end, time.monotonic(), **self.attributes)
+
+
+class LatencyTracer:
+    """
+    Collects per-stage latency spans for the STT->TTS loop.
+
+    Spans are appended to trace_file as JSON lines as they complete, and
+    p50/p95/p99 per stage are available from summary() at any time.
+    """
+
+    def __init__(self, trace_file=None):
+        self.trace_file = trace_file
+        self._f = None
+        if trace_file:
+            Path(trace_file).parent.mkdir(parents=True, exist_ok=True)
+            self._f = open(trace_file, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.durations = {}
+
+    def start_utterance(self, speech_end=None):
+        """Begin tracing an utterance; speech_end is the monotonic time the speaker stopped"""
+        with self._lock:
+            utterance_id = self._next_id
+            self._next_id += 1
+        return UtteranceTrace(self, utterance_id, speech_end if speech_end is not None else time.monotonic())
+
+    def record(self, span):
+        with self._lock:
+            self.durations.setdefault(span['stage'], []).append(span['duration_ms'])
+            if self._f:
+                self._f.write(json.dumps(span) + "\n")
+                self._f.flush()
+
+    def summary(self):
+        """p50/p95/p99 in milliseconds per stage"""
+        with self._lock:
+            durations = {stage: list(values) for stage, values in self.durations.items()}
+        stages = [stage for stage in STAGES if stage in durations]
+        stages += [stage for stage in durations if stage not in STAGES]
+        return {
+            stage: {
+                'count': len(durations[stage]),
+                'p50': percentile(durations[stage], 50),
+                'p95': percentile(durations[stage], 95),
+                'p99': percentile(durations[stage], 99),
+            }
+            for stage in stages
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary:
+            return
+        print("\nLatency summary (ms)")
+        print(f"{'stage':<20}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for stage, stats in summary.items():
+            print(f"{stage:<20}{stats['count']:>7}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+
+    def close(self):
+        if self._f:
+            self._f.close()
+            self._f = None
+
+
+class NullTrace:
+    """Stand-in used when no utterance is being traced"""
+
+    @contextmanager
+    def span(self, stage, **attributes):
+        yield
+
+    def add_span(self, stage, start, end, **attributes):
+        pass
+
+    def finish(self, **attributes):
+        pass
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from live_captions import RealTimeController
+
+
+def run_steady(controller, rtf, calls=10):
+    """Feed record() a real-time source decoded at a constant RTF"""
+    switches = []
+    for _ in range(calls):
+        window = controller.window
+        decode = rtf * window
+        # Audio captured while decoding is what is waiting afterwards
+        switches.append(controller.record(window, decode, decode))
+    return switches
+
+
+def test_steady_rtf_within_slo_keeps_model():
+    controller = RealTimeController("base", window=3.0, latency_slo=5.0)
+    switches = run_steady(controller, 0.5)
+    assert controller.lag == 4.5
+    assert controller.fallback
+    assert switches == [None] * len(switches)
+
+
+def test_sustained_lag_over_slo_downgrades_model():
+    controller = RealTimeController("base", window=3.0, latency_slo=5.0, patience=3)
+    switches = run_steady(controller, 1.0)
+    assert not controller.fallback
+    assert "tiny" in switches
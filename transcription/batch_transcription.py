@@ -1,42 +1,108 @@
 import os
 from pathlib import Path
-import json
 import logging
 from datetime import datetime
-from ..models.whisper_model import WhisperModel
-from ..audio.processor import AudioProcessor
-from ..config.settings import SUPPORTED_FORMATS, OUTPUT_DIR
+from models.whisper_model import WhisperModel
+from audio.processor import AudioProcessor
+from audio.features import get_default_feature_cache
+from config.settings import (SUPPORTED_FORMATS, OUTPUT_DIR, LANGUAGE_PROBE_SECONDS,
+                               LANGUAGE_CONFIDENCE_THRESHOLD)
+from config.runtime import configure_runtime
+from .writers import MultiWriter, WRITERS
+from .language import LanguageIdentifier
 
 class BatchTranscriber:
-    def __init__(self, model_size="base"):
-        self.model = WhisperModel(model_size)
+    def __init__(self, model_size="base", feature_cache=None, decode_profile=None, store=None,
+                 threads=None, reserve_live=None, language_scope="directory"):
+        # Thread counts and CPU affinity must be set before the model is created
+        self.runtime = configure_runtime("batch", threads=threads, reserve_live=reserve_live)
+        self.model_size = model_size
+        self.decode_profile = decode_profile
+        # Optional TranscriptStore; results are bulk-inserted for full-text search
+        self.store = store
         self.audio_processor = AudioProcessor()
+        # Log-mel features are shared with any other transcriber in the process
+        self.feature_cache = feature_cache or get_default_feature_cache()
+        self.model = WhisperModel(model_size, feature_cache=self.feature_cache)
+        # Auto-detected languages are cached per file, or per directory ("directory" scope)
+        self.language_identifier = LanguageIdentifier(
+            self.model,
+            probe_seconds=LANGUAGE_PROBE_SECONDS,
+            threshold=LANGUAGE_CONFIDENCE_THRESHOLD,
+            per_directory=language_scope == "directory"
+        ) if language_scope in ("file", "directory") else None
         self.logger = logging.getLogger(__name__)
         
         # Ensure output directory exists
         OUTPUT_DIR.mkdir(exist_ok=True)
     
     def transcribe_file(self, audio_path, output_format="txt", **options):
-        """Transcribe a single audio file"""
+        """
+        Transcribe a single audio file
+
+        output_format may be a single format or a list of formats; all of
+        them are written from the same transcription pass.
+        """
         audio_path = Path(audio_path)
         
         if audio_path.suffix.lower() not in SUPPORTED_FORMATS:
             raise ValueError(f"Unsupported format: {audio_path.suffix}")
         
-        self.logger.info(f"Transcribing: {audio_path}")
+        output_formats = [output_format] if isinstance(output_format, str) else list(output_format)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        writer = MultiWriter.for_formats(output_formats, OUTPUT_DIR, f"{audio_path.stem}_{timestamp}")
+        
+        if self.decode_profile is not None:
+            options.setdefault('decode_profile', self.decode_profile)
         
-        # Transcribe
-        result = self.model.transcribe(audio_path, **options)
+        # Detect the language once on a speech probe and decode with it fixed
+        language_id = None
+        if options.get('language') is None and self.language_identifier is not None:
+            language_id = self.language_identifier.identify(audio_path)
+            options['language'] = language_id['language']
         
-        if result:
-            # Save result
-            output_file = self._save_result(audio_path, result, output_format)
-            self.logger.info(f"Transcription saved: {output_file}")
-            return result, output_file
+        self.logger.info(f"Transcribing: {audio_path}")
+        writer.open(audio_path, self.model_size, options.get('language'))
+        
+        try:
+            # Transcribe, writing each segment as soon as its window is decoded
+            result = self.model.transcribe(audio_path, on_segment=writer.write_segment, **options)
+
+            if result and language_id and language_id['source'] != "probe" \
+                    and self.language_identifier.needs_redetect(result):
+                redetected = self.language_identifier.redetect(audio_path)
+                if redetected['language'] != language_id['language']:
+                    # Start the outputs over; the first pass was in the wrong language
+                    options['language'] = redetected['language']
+                    writer.abort()
+                    writer.open(audio_path, self.model_size, options['language'])
+                    result = self.model.transcribe(audio_path, on_segment=writer.write_segment, **options)
+                language_id = redetected
+            
+            if result and language_id:
+                result['language_probability'] = language_id['probability']
+                result['language_source'] = language_id['source']
+            
+            if not result:
+                writer.abort()
+                return None, None
+            
+            output_files = writer.close(result)
+            if result.get('strategies'):
+                self.logger.info(f"Decoding strategies: {result['strategies']}")
+        except BaseException:
+            writer.abort()
+            raise
         
-        return None, None
+        result['output_files'] = {fmt: str(path) for fmt, path in output_files.items()}
+        output_file = output_files[WRITERS[output_formats[0]].extension] if output_formats else None
+        if output_files:
+            self.logger.info(f"Transcription saved: {', '.join(result['output_files'].values())}")
+        if self.store is not None:
+            self.store.add(audio_path, result)
+        return result, output_file
     
-    def transcribe_directory(self, directory_path, **options):
+    def transcribe_directory(self, directory_path, output_format="txt", **options):
         """Transcribe all audio files in a directory"""
         directory_path = Path(directory_path)
         audio_files = []
@@ -47,59 +113,21 @@ class BatchTranscriber:
         results = []
         for audio_file in audio_files:
             try:
-                result, output_file = self.transcribe_file(audio_file, **options)
+                result, output_file = self.transcribe_file(audio_file, output_format=output_format, **options)
                 if result:
                     results.append({
                         'input_file': str(audio_file),
-                        'output_file': str(output_file),
+                        'output_file': str(output_file) if output_file else None,
+                        'output_files': result['output_files'],
                         'text': result['text'],
                         'language': result['language'],
+                        'language_probability': result.get('language_probability'),
                         'processing_time': result['processing_time']
                     })
             except Exception as e:
                 self.logger.error(f"Failed to transcribe {audio_file}: {e}")
         
-        return results
-    
-    def _save_result(self, audio_path, result, output_format):
-        """Save transcription result"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name = f"{audio_path.stem}_{timestamp}"
-        
-        if output_format == "txt":
-            output_file = OUTPUT_DIR / f"{base_name}.txt"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(f"File: {audio_path}\n")
-                f.write(f"Language: {result['language']}\n")
-                f.write(f"Processing time: {result['processing_time']:.2f}s\n")
-                f.write(f"Model: {result['model_info']['model_size']}\n")
-                f.write("=" * 50 + "\n")
-                f.write(result['text'])
-        
-        elif output_format == "json":
-            output_file = OUTPUT_DIR / f"{base_name}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+        if self.store is not None:
+            self.store.flush()
         
-        elif output_format == "srt":
-            output_file = OUTPUT_DIR / f"{base_name}.srt"
-            self._save_as_srt(output_file, result)
-        
-        return output_file
-    
-    def _save_as_srt(self, output_file, result):
-        """Save as SRT subtitle format"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for i, segment in enumerate(result['segments'], 1):
-                start_time = self._format_timestamp(segment['start'])
-                end_time = self._format_timestamp(segment['end'])
-                f.write(f"{i}\n")
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{segment['text'].strip()}\n\n")
-    
-    def _format_timestamp(self, seconds):
-        """Format timestamp for SRT"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = seconds % 60
-        return f"{hours:02d}:{minutes:02d}:{secs:06.3f}".replace('.', ',')
\ No newline at end of file
+        return results
@@ -0,0 +1,71 @@
+import logging
+import threading
+from pathlib import Path
+
+
+class LanguageIdentifier:
+    """
+    Language ID on a short speech probe, cached per file and per directory.
+
+    A directory's language is remembered once a file in it is detected with
+    at least `threshold` probability, and later files in that directory skip
+    detection entirely. If decoding with a cached language looks poor (see
+    needs_redetect), the file is probed again; the directory's language is
+    only replaced if that probe confidently finds a different one.
+    """
+
+    def __init__(self, model, probe_seconds=10.0, threshold=0.8, per_directory=True,
+                 redetect_logprob=-1.0):
+        self.model = model
+        self.probe_seconds = probe_seconds
+        self.threshold = threshold
+        self.per_directory = per_directory
+        self.redetect_logprob = redetect_logprob
+        self.logger = logging.getLogger(__name__)
+
+        self._files = {}
+        self._directories = {}
+        self._lock = threading.Lock()
+
+    def identify(self, audio_path):
+        """Return {'language', 'probability', 'source'} for a file"""
+        audio_path = Path(audio_path).resolve()
+        directory = audio_path.parent
+
+        with self._lock:
+            if audio_path in self._files:
+                return dict(self._files[audio_path], source="file-cache")
+            if self.per_directory and directory in self._directories:
+                return dict(self._directories[directory], source="directory-cache")
+
+        return self._probe(audio_path)
+
+    def _probe(self, audio_path):
+        mel = self.model.load_features(audio_path)
+        language, probability = self.model.detect_language(mel, self.probe_seconds)
+        decision = {'language': language, 'probability': probability}
+
+        with self._lock:
+            self._files[audio_path] = decision
+            # Only a confident detection sets or replaces the directory's language
+            if self.per_directory and probability >= self.threshold:
+                self._directories[audio_path.parent] = decision
+
+        return dict(decision, source="probe")
+
+    def needs_redetect(self, result):
+        """True if a transcript decoded with a cached language looks like the wrong language"""
+        segments = result.get('segments') or []
+        if not segments:
+            # Silence or music: no decoded speech to judge the language by
+            return False
+        mean_logprob = sum(segment['avg_logprob'] for segment in segments) / len(segments)
+        return mean_logprob < self.redetect_logprob
+
+    def redetect(self, audio_path):
+        """Forget the cached decision for this file and probe again"""
+        audio_path = Path(audio_path).resolve()
+        with self._lock:
+            self._files.pop(audio_path, None)
+        self.logger.info(f"Low decoding confidence, re-detecting language for {audio_path}")
+        return self._probe(audio_path)
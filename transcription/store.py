@@ -0,0 +1,174 @@
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    model TEXT NOT NULL,
+    language TEXT,
+    duration_ms INTEGER,
+    processing_time REAL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transcripts_file ON transcripts(file);
+
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    transcript_id INTEGER NOT NULL REFERENCES transcripts(id),
+    seq INTEGER NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_segments_transcript ON segments(transcript_id, seq);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text,
+    content='segments',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+
+class TranscriptStore:
+    """
+    Embedded SQLite store for transcripts with FTS5 search over segments.
+
+    Each segment row carries its file, model and start/end offsets in
+    milliseconds. Transcripts are buffered and written in bulk, one
+    transaction per batch_size transcripts; call flush() or close() to
+    write whatever is pending. Indexing a file again with the same model
+    replaces its previous transcript.
+    """
+
+    def __init__(self, db_path, batch_size=50):
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+        self._pending = []
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def add(self, audio_path, result):
+        """Queue a transcription result for the next bulk insert"""
+        # One key per file however it was named (relative, via "..", other cwd)
+        audio_path = str(Path(audio_path).resolve())
+        with self._lock:
+            self._pending.append((audio_path, result))
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        created_at = datetime.now().isoformat(timespec="seconds")
+
+        with self.conn:
+            for audio_path, result in pending:
+                self._delete_transcripts(audio_path, result['model_info']['model_size'])
+                duration = result.get('duration')
+                cursor = self.conn.execute(
+                    "INSERT INTO transcripts (file, model, language, duration_ms, processing_time, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        audio_path,
+                        result['model_info']['model_size'],
+                        result.get('language'),
+                        int(duration * 1000) if duration is not None else None,
+                        result.get('processing_time'),
+                        created_at,
+                    ),
+                )
+                transcript_id = cursor.lastrowid
+                rows = [
+                    (transcript_id, seq, int(segment['start'] * 1000), int(segment['end'] * 1000),
+                     segment['text'].strip())
+                    for seq, segment in enumerate(result['segments'])
+                ]
+                self.conn.executemany(
+                    "INSERT INTO segments (transcript_id, seq, start_ms, end_ms, text) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self.conn.execute(
+                    "INSERT INTO segments_fts (rowid, text) SELECT id, text FROM segments WHERE transcript_id = ?",
+                    (transcript_id,),
+                )
+        self.logger.info(f"Stored {len(pending)} transcript(s) in {self.db_path}")
+
+    def _delete_transcripts(self, audio_path, model):
+        """Remove earlier transcripts of a file by a model, with their segments and index entries"""
+        transcript_ids = [
+            row[0] for row in self.conn.execute(
+                "SELECT id FROM transcripts WHERE file = ? AND model = ?", (audio_path, model)
+            )
+        ]
+        for transcript_id in transcript_ids:
+            # External-content FTS tables need the old text to remove index entries
+            self.conn.execute(
+                "INSERT INTO segments_fts (segments_fts, rowid, text) "
+                "SELECT 'delete', id, text FROM segments WHERE transcript_id = ?",
+                (transcript_id,),
+            )
+            self.conn.execute("DELETE FROM segments WHERE transcript_id = ?", (transcript_id,))
+            self.conn.execute("DELETE FROM transcripts WHERE id = ?", (transcript_id,))
+
+    def search(self, query, limit=20, model=None, file_pattern=None):
+        """
+        Full-text search over segment text (FTS5 query syntax).
+        Returns dicts with file, model, start_ms, end_ms and text, best match first.
+        """
+        self.flush()
+        sql = (
+            "SELECT t.file, t.model, t.language, s.start_ms, s.end_ms, s.text, "
+            "snippet(segments_fts, 0, '[', ']', '...', 16) "
+            "FROM segments_fts "
+            "JOIN segments s ON s.id = segments_fts.rowid "
+            "JOIN transcripts t ON t.id = s.transcript_id "
+            "WHERE segments_fts MATCH ?"
+        )
+        params = [query]
+        if model:
+            sql += " AND t.model = ?"
+            params.append(model)
+        if file_pattern:
+            sql += " AND t.file LIKE ?"
+            params.append(file_pattern)
+        sql += " ORDER BY segments_fts.rank LIMIT ?"
+        params.append(limit)
+
+        return [
+            {
+                'file': row[0],
+                'model': row[1],
+                'language': row[2],
+                'start_ms': row[3],
+                'end_ms': row[4],
+                'text': row[5],
+                'snippet': row[6],
+            }
+            for row in self.conn.execute(sql, params)
+        ]
+
+    def stats(self):
+        transcripts = self.conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+        segments = self.conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {'transcripts': transcripts, 'segments': segments}
+
+    def close(self):
+        self.flush()
+        self.conn.close()
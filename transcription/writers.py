@@ -0,0 +1,184 @@
+import os
+import json
+from pathlib import Path
+
+
+def format_timestamp(seconds):
+    """Format timestamp for SRT"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{secs:06.3f}".replace('.', ',')
+
+
+class TranscriptWriter:
+    """
+    Incremental transcript writer.
+
+    Segments are appended and flushed as soon as they are produced. Output
+    goes to a temporary file next to the target and is atomically renamed
+    into place by close(), so a crashed run never leaves a truncated file
+    under the final name.
+    """
+    extension = None
+
+    def __init__(self, output_file):
+        self.output_file = Path(output_file)
+        self.temp_file = self.output_file.with_name(self.output_file.name + ".part")
+        self._f = None
+        self.segment_count = 0
+
+    def open(self, audio_path, model_size, language=None):
+        """Open the temporary file and write any header"""
+        self._f = open(self.temp_file, 'w', encoding='utf-8')
+        self.segment_count = 0
+        self.write_header(audio_path, model_size, language)
+        self._f.flush()
+        return self
+
+    def write_segment(self, segment):
+        """Append a single decoded segment"""
+        self.segment_count += 1
+        self._write_segment(segment)
+        self._f.flush()
+
+    def close(self, result):
+        """Write any footer, sync to disk and move into place"""
+        self.write_footer(result)
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+        self._f = None
+        os.replace(self.temp_file, self.output_file)
+        return self.output_file
+
+    def abort(self):
+        """Discard the partial output"""
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        if self.temp_file.exists():
+            self.temp_file.unlink()
+
+    def write_header(self, audio_path, model_size, language):
+        pass
+
+    def _write_segment(self, segment):
+        pass
+
+    def write_footer(self, result):
+        pass
+
+
+class TxtWriter(TranscriptWriter):
+    extension = "txt"
+
+    def write_header(self, audio_path, model_size, language):
+        self._f.write(f"File: {audio_path}\n")
+        self._f.write(f"Language: {language or 'auto'}\n")
+        self._f.write(f"Model: {model_size}\n")
+        self._f.write("=" * 50 + "\n")
+
+    def _write_segment(self, segment):
+        text = segment['text']
+        if self.segment_count == 1:
+            text = text.lstrip()
+        self._f.write(text)
+
+    def write_footer(self, result):
+        self._f.write("\n" + "=" * 50 + "\n")
+        if result.get('language_probability') is not None:
+            self._f.write(f"Detected language: {result['language']} ({result['language_probability']:.2f})\n")
+        else:
+            self._f.write(f"Detected language: {result['language']}\n")
+        self._f.write(f"Processing time: {result['processing_time']:.2f}s\n")
+
+
+class SrtWriter(TranscriptWriter):
+    extension = "srt"
+
+    def _write_segment(self, segment):
+        start_time = format_timestamp(segment['start'])
+        end_time = format_timestamp(segment['end'])
+        self._f.write(f"{self.segment_count}\n")
+        self._f.write(f"{start_time} --> {end_time}\n")
+        self._f.write(f"{segment['text'].strip()}\n\n")
+
+
+class JsonlWriter(TranscriptWriter):
+    """One JSON object per segment, followed by a summary record"""
+    extension = "jsonl"
+
+    def _write_segment(self, segment):
+        record = {
+            'type': 'segment',
+            'id': segment.get('id', self.segment_count - 1),
+            'start': segment['start'],
+            'end': segment['end'],
+            'text': segment['text'].strip(),
+        }
+        if 'strategy' in segment:
+            record['strategy'] = segment['strategy']
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_footer(self, result):
+        record = {
+            'type': 'summary',
+            'language': result['language'],
+            'language_probability': result.get('language_probability'),
+            'processing_time': result['processing_time'],
+            'segments': self.segment_count,
+        }
+        if result.get('strategies'):
+            record['strategies'] = result['strategies']
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class JsonWriter(TranscriptWriter):
+    """Full result as a single JSON document (written on close)"""
+    extension = "json"
+
+    def write_footer(self, result):
+        json.dump(result, self._f, indent=2, ensure_ascii=False)
+
+
+WRITERS = {
+    "txt": TxtWriter,
+    "json": JsonWriter,
+    "jsonl": JsonlWriter,
+    "srt": SrtWriter,
+}
+
+
+class MultiWriter:
+    """Fan a single transcription pass out to several output formats"""
+
+    def __init__(self, writers):
+        self.writers = list(writers)
+
+    @classmethod
+    def for_formats(cls, output_formats, output_dir, base_name):
+        writers = []
+        # Each format maps to one file; a repeated format would open it twice
+        for output_format in dict.fromkeys(output_formats):
+            if output_format not in WRITERS:
+                raise ValueError(f"Unsupported output format: {output_format}")
+            writer_cls = WRITERS[output_format]
+            writers.append(writer_cls(Path(output_dir) / f"{base_name}.{writer_cls.extension}"))
+        return cls(writers)
+
+    def open(self, audio_path, model_size, language=None):
+        for writer in self.writers:
+            writer.open(audio_path, model_size, language)
+        return self
+
+    def write_segment(self, segment):
+        for writer in self.writers:
+            writer.write_segment(segment)
+
+    def close(self, result):
+        return {writer.extension: writer.close(result) for writer in self.writers}
+
+    def abort(self):
+        for writer in self.writers:
+            writer.abort()